@@ -0,0 +1,88 @@
+## Benchmark: `ollama run` subprocess per turn vs pooled HTTP client ##
+"""
+Sends the same prompt N times through both paths and prints per-turn latency.
+
+    python bench_client.py                # 5 turns each
+    python bench_client.py --turns 20 --prompt "Say hi in one word."
+    python bench_client.py --thinking     # tokens/time saved by think=False
+"""
+
+import argparse
+import asyncio
+import statistics
+import subprocess
+import time
+
+import ollama_client
+
+
+def ask_subprocess(prompt, model=ollama_client.MODEL):
+  """The old path: spawn the ollama CLI and pipe the prompt over stdin."""
+  think = "--think=true" if ollama_client.THINK else "--think=false"
+  result = subprocess.run(
+    ["ollama", "run", model, think],
+    input=prompt.encode("utf-8"),
+    capture_output=True,
+  )
+  return result.stdout.decode("utf-8").strip()
+
+
+def percentile(values, pct):
+  ordered = sorted(values)
+  index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+  return ordered[index]
+
+
+def time_turns(ask, prompt, turns):
+  latencies = []
+  for _ in range(turns):
+    start = time.perf_counter()
+    ask(prompt)
+    latencies.append(time.perf_counter() - start)
+  return latencies
+
+
+async def time_async_turns(prompt, turns):
+  """Fire all turns at once over the shared async client."""
+  async def one():
+    start = time.perf_counter()
+    await ollama_client.ask_ollama_async(prompt)
+    return time.perf_counter() - start
+  return await asyncio.gather(*(one() for _ in range(turns)))
+
+
+def report(name, latencies):
+  print(f"{name:<18} mean {statistics.mean(latencies):7.3f}s   "
+        f"p50 {percentile(latencies, 50):7.3f}s   "
+        f"p95 {percentile(latencies, 95):7.3f}s   "
+        f"min {min(latencies):7.3f}s")
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--turns", type=int, default=5)
+  parser.add_argument("--prompt", default="Reply with one short greeting.")
+  parser.add_argument("--thinking", action="store_true", help="compare think=True vs think=False instead")
+  args = parser.parse_args()
+
+  if args.thinking:
+    totals = {}
+    for _ in range(args.turns):
+      for key, value in ollama_client.measure_thinking_savings(args.prompt).items():
+        totals[key] = totals.get(key, 0) + value
+    print(f"Model: {ollama_client.MODEL}   turns: {args.turns}   (averages per turn)\n")
+    for key, value in totals.items():
+      print(f"{key:<26} {value / args.turns:10.2f}")
+    return
+
+  # Warm up once so both paths start with the model already loaded
+  ollama_client.ask_ollama(args.prompt)
+
+  print(f"Model: {ollama_client.MODEL}   turns: {args.turns}\n")
+  report("subprocess", time_turns(ask_subprocess, args.prompt, args.turns))
+  report("pooled http", time_turns(ollama_client.ask_ollama, args.prompt, args.turns))
+  report("pooled async", asyncio.run(time_async_turns(args.prompt, args.turns)))
+
+
+if __name__ == "__main__":
+  main()
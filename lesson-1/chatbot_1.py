@@ -1,15 +1,7 @@
 ## A simple chat bot ##
 
-import subprocess
-
-def ask_ollama(prompt):
-    # Run ollama CLI with subprocess
-    result = subprocess.run(
-        ["ollama", "run", "qwen3:4b"],
-        input=prompt.encode("utf-8"),
-        capture_output=True
-    )
-    return result.stdout.decode("utf-8")
+# Shared HTTP client: one pooled keep-alive connection instead of `ollama run` per message
+from ollama_client import ask_ollama
 
 # First test
 user_message = "Hello how are you?"
@@ -1,20 +1,14 @@
 ## A simple chat bot with interactive mode ##
 
-import subprocess
+import ollama_client
 
 #ask_ollama function
 def ask_ollama(user_input):
   # Add instructions for clean reply
   prompt = f""" You are a chatbot. Reply ONLY in final plain text. Do NOT include reasoning, explanations, or any extra text.User said: "{user_input}" Reply in plain text: """
   
-  #Run ollama CLT with subprocess
-  result = subprocess.run(
-    ["ollama", "run", "qwen3:4b"],
-    input=prompt.encode("utf-8"),
-    capture_output=True,
-  )
-  # Decode from bytes → string and return
-  return result.stdout.decode("utf-8").strip()
+  # Send to Ollama over the shared HTTP connection and return the text
+  return ollama_client.ask_ollama(prompt)
 
 def chat():
   print("Chatbot ready! Type 'exit' to quit.\n")
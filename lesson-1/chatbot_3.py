@@ -1,15 +1,7 @@
 ## A simple chat bot with interactive mode  and loding ##
 
-import subprocess
-import time
-
-def loading_indicator():
-  print("Bot is thinking:")
-  print(f"Loading...")
-  print()  # new line
-  for i in range(0, 101, 20): #increment of 20%
-    time.sleep(0.3)
-  
+import ollama_client
+from spinner import Spinner
 
 
 #ask_ollama function
@@ -17,15 +9,10 @@ def ask_ollama(user_input):
   # Add instructions for clean reply
   prompt = f""" You are a chatbot. Reply ONLY in final plain text. Do NOT include reasoning, explanations, or any extra text.User said: "{user_input}" Reply in plain text: """
   
-  loading_indicator()  # show loading first
-  #Run ollama CLT with subprocess
-  result = subprocess.run(
-    ["ollama", "run", "qwen3:4b"],
-    input=prompt.encode("utf-8"),
-    capture_output=True,
-  )
-  # Decode from bytes → string and return
-  return result.stdout.decode("utf-8").strip()
+  # Spinner runs only while we actually wait for the model (no fixed delay)
+  with Spinner("Bot is thinking"):
+    # Send to Ollama over the shared HTTP connection and return the text
+    return ollama_client.ask_ollama(prompt)
 
 def chat():
   print("Chatbot ready! Type 'exit' to quit.\n")
@@ -1,67 +1,64 @@
 ## A simple chat bot with interactive mode  and loding ##
 
-import subprocess
-import time
+import ollama_client
+from memory import ConversationMemory
+from sanitizer import StreamSanitizer, sanitize
+from session import REPLY_RESERVE, ChatSession
+from spinner import Spinner
 
-def loading_indicator():
-  print("Bot is thinking:")
-  print(f"Loading...")
-  print()  # new line
-  for i in range(0, 101, 20): #increment of 20%
-    time.sleep(0.3)
+SYSTEM_PROMPT = "You are a helpful chatbot. Reply ONLY in final plain text. Do NOT include reasoning."
+# Upper bound for the prompt's token budget; older turns are folded into a summary
+# beyond it. The model's context window minus REPLY_RESERVE can lower it, see memory_tokens()
+MEMORY_TOKENS = 4096
+
+# Print tokens as they arrive (set to False for the old wait-for-everything mode)
+STREAM = True
+# Characters of an unfinished line held back before they are shown. 0 = only the
+# tail a reasoning marker could still start in, so tokens appear a few words behind
+STREAM_LOOKAHEAD = 0
+# Reuse the model's KV context between turns so only the new message is sent
+SESSION_MODE = True
 
 
 def clean_bot_response(response):
-    # Remove known 'thinking' lines or reasoning markers
-    reasoning_lines = [
-        "Hmm, the user just",  # Common Qwen reasoning lead
-        "I need to respond", 
-        "Since they're greeting me", 
-        "No need to add anything else",
-        "Just the phrase", 
-        "#", 
-        "checks requirements again",
-        "...done thinking."
-    ]
-    lines = response.splitlines()
-    filtered = [
-        line for line in lines
-        if not any(r in line for r in reasoning_lines)
-        and not line.strip().startswith("*")  # remove actions
-    ]
-    # Remove empty lines
-    filtered = [line for line in filtered if line.strip() != ""]
-    return "\n".join(filtered).strip()
+    # Remove known 'thinking' lines, reasoning blocks, "*actions*" and empty lines
+    # (same rules the streaming path applies chunk by chunk, see sanitizer.py)
+    return sanitize(response)
+
+
+def summarize_with_model(summary, turns):
+  """Fold old turns into the running summary using the model itself."""
+  transcript = "\n".join(f"{'User' if role == 'user' else 'Bot'}: {message}" for role, message in turns)
+  prompt = (
+    "Update the running summary of a chat. Keep names, facts and open questions. "
+    "Reply with the new summary only, at most 5 short sentences.\n\n"
+    f"Current summary: {summary or '(empty)'}\n\nNew lines:\n{transcript}\n\nNew summary:"
+  )
+  return clean_bot_response(ollama_client.ask_ollama(prompt))
+
+
+def memory_tokens():
+  """Prompt budget that leaves the model room for its reply: min(window - reserve, MEMORY_TOKENS)."""
+  window = ollama_client.context_window()
+  # Tiny windows: split them between prompt and reply instead of going negative
+  return max(window // 2, min(MEMORY_TOKENS, window - REPLY_RESERVE))
+
+
+def new_memory():
+  """Conversation memory with a token budget that fits the model (old turns get summarized)."""
+  return ConversationMemory(SYSTEM_PROMPT, budget=memory_tokens(), summarize=summarize_with_model)
 
 
 #ask_ollama function
-def ask_ollama(conversation_history):
+def ask_ollama(memory):
   """
-  conversation_history: list of tuples (role, message)
-  role: "user" or "bot"
+  memory: ConversationMemory holding the conversation so far
   """
-  # Build the prompt with history
-  prompt_text = "You are a helpful chatbot. Reply ONLY in final plain text. Do NOT include reasoning.\n\n"
-
-  for role, message in conversation_history:
-    if role == "user":
-      prompt_text += f"User: {message}\n"
-    elif role == "bot":
-      prompt_text += f"Bot: {message}\n"
-  prompt_text += "Bot:"
-    
-  
-  loading_indicator()  # show loading first
-  
-  #Run ollama CLT with subprocess
-  result = subprocess.run(
-    ["ollama", "run", "qwen3:4b"],
-    input=prompt_text.encode("utf-8"),
-    capture_output=True,
-  )
-  
-  # Decode and strip possible prefix
-  response = result.stdout.decode("utf-8").strip()
+  prompt_text = memory.render()
+
+  # Send to Ollama over the shared HTTP connection (spinner only while waiting)
+  with Spinner("Bot is thinking"):
+    response = ollama_client.ask_ollama(prompt_text)
   
   # Remove possible "Bot:" at the beginning, if present
   if response.startswith("Bot:"):
@@ -71,9 +68,54 @@ def ask_ollama(conversation_history):
   return response
 
 
+def ask_ollama_stream(memory, session=None):
+  """
+  Streaming version of ask_ollama: prints the reply while it is generated.
+  With a ChatSession only the newest turn is sent (full replay if the context is lost).
+  Returns (cleaned reply, TurnStats). The returned reply is the one-shot cleanup of
+  the whole reply, exactly what ask_ollama would store; the streamed text can keep
+  part of a long line whose marker only showed up after it was printed.
+  """
+  stats = ollama_client.TurnStats()
+  if session is not None:
+    chunks = session.stream(memory.render_last_turn(), memory.render, turn_stats=stats,
+                            version=memory.folded_turns)
+  else:
+    chunks = ollama_client.stream_ollama(memory.render(), stats=stats)
+  spinner = Spinner("Bot is thinking").start()
+  sanitizer = StreamSanitizer(strip_prefix="Bot:", lookahead=STREAM_LOOKAHEAD)
+  shown = []     # clean text already printed
+  raw = []       # reply as generated
+
+  def emit(text):
+    if text:
+      if not shown:
+        print("Bot: ", end="")
+      print(text, end="", flush=True)
+      shown.append(text)
+
+  try:
+    for text in chunks:
+      spinner.stop()  # first token arrived
+      raw.append(text)
+      emit(sanitizer.feed(text))
+    emit(sanitizer.flush())
+  finally:
+    spinner.stop()
+
+  if not shown:
+    print("Bot:", end="")
+  print()
+  response = sanitize("".join(raw), strip_prefix="Bot:")
+  if session is not None:
+    session.keep(response)  # replay next turn if cleanup dropped content from the raw reply
+  return response, stats
+
+
 def chat():
   print("🤖 Chatbot ready! Type 'exit' 'quit' 'q' to quit.\n")
-  conversation_history = []
+  memory = new_memory()
+  session = ChatSession(max_context=memory.budget) if SESSION_MODE else None
 
   while True:
     #Get user input
@@ -81,17 +123,23 @@ def chat():
 
     if user_input.lower() in ["exit", "quit", "bye", "q"]:
       print("Bot: Says good bye")
+      if session is not None:
+        print(f"  [session: {session.stats.summary()}]")
       break
     
-    # Add user message to history
-    conversation_history.append(("user", user_input))
+    # Add user message to memory
+    memory.add("user", user_input)
 
     # Get bot response
-    response = ask_ollama(conversation_history)
+    if STREAM:
+      response, stats = ask_ollama_stream(memory, session)
+      print(f"  [{stats.summary()}]")
+    else:
+      response = ask_ollama(memory)
+      print("Bot:", response)
 
-    # Print response and add to history
-    print("Bot:", response)
-    conversation_history.append(("bot", response))
+    # Add response to memory
+    memory.add("bot", response)
 
 
 # Run chatbot
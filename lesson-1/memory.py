@@ -0,0 +1,136 @@
+## Token-budgeted rolling conversation memory ##
+"""
+Keeps a chat transcript inside a fixed token budget.
+
+- The most recent turns stay verbatim.
+- When they no longer fit, the oldest turns are folded into a running summary
+  (several turns at once, so the summarizer is not called on every message).
+- The rendered text (system prompt + summary + recent turns) is cached: adding
+  a turn appends that one line to it, and the whole text is only rebuilt after
+  old turns are folded into the summary.
+
+The prompt sent to the model therefore never grows past `budget` tokens, no
+matter how long the session runs.
+
+Usage:
+    memory = ConversationMemory("You are a helpful chatbot.", budget=2048)
+    memory.add("user", "Hello")
+    prompt = memory.render()        # "...User: Hello\nBot:"
+    memory.add("bot", reply)
+"""
+
+from collections import deque
+
+ROLE_LABELS = {"user": "User", "bot": "Bot"}
+
+
+def estimate_tokens(text):
+  """Cheap token estimate (~4 characters per token for English text)."""
+  return len(text) // 4 + 1
+
+
+def fold_summary(summary, turns, max_chars=2000):
+  """Default summarizer: keep the first sentence of each evicted turn.
+
+  Works offline; pass a model-backed `summarize` to ConversationMemory for
+  better summaries. `turns` is a list of (role, message) tuples.
+  """
+  notes = [summary] if summary else []
+  for role, message in turns:
+    first = message.strip().split("\n")[0].split(". ")[0][:160]
+    notes.append(f"{ROLE_LABELS.get(role, role)}: {first}")
+  text = " | ".join(notes)
+  # Keep the most recent part if the summary itself gets too long
+  return text[-max_chars:]
+
+
+class ConversationMemory:
+  """Recent turns verbatim + running summary of older turns, within a token budget."""
+
+  def __init__(self, system_prompt, budget=2048, summary_budget=256, summarize=None,
+               low_watermark=0.75, count_tokens=estimate_tokens):
+    """
+    budget:         max tokens for the whole rendered prompt
+    summary_budget: tokens reserved for the running summary
+    summarize:      fn(previous_summary, [(role, message), ...]) -> new summary
+    low_watermark:  after folding, recent turns use at most this share of their budget
+    """
+    self.system_prompt = system_prompt.rstrip() + "\n\n"
+    self.budget = budget
+    self.summary_budget = summary_budget
+    self.summarize = summarize or fold_summary
+    self.low_watermark = low_watermark
+    self.count_tokens = count_tokens
+
+    self.summary = ""
+    self.turns = deque()           # (role, message, rendered line, tokens)
+    self.turn_tokens = 0           # running total for self.turns
+    self.folded_turns = 0          # how many turns live only in the summary
+    self._system_tokens = count_tokens(self.system_prompt)
+    self._prefix = None            # cached system prompt + summary
+    self._text = None              # cached prefix + recent turns (None = rebuild)
+
+  # ---------- public API ----------
+  def add(self, role, message):
+    """Append one turn; folds old turns into the summary when over budget."""
+    line = f"{ROLE_LABELS.get(role, role)}: {message}\n"
+    tokens = self.count_tokens(line)
+    self.turns.append((role, message, line, tokens))
+    self.turn_tokens += tokens
+    if self._text is not None:
+      self._text += line
+    if self.turn_tokens > self.turn_budget:
+      self._fold()
+
+  def render(self):
+    """Prompt text: cached prefix + recent turns + the "Bot:" cue."""
+    if self._text is None:
+      self._text = self.prefix + "".join(t[2] for t in self.turns)
+    return self._text + "Bot:"
+
+  def render_last_turn(self):
+    """Only the newest turn + "Bot:" (what a session with a live KV context sends)."""
+    return self.turns[-1][2] + "Bot:" if self.turns else "Bot:"
+
+  @property
+  def prefix(self):
+    if self._prefix is None:
+      summary = f"Summary of the earlier conversation: {self.summary}\n\n" if self.summary else ""
+      self._prefix = self.system_prompt + summary
+    return self._prefix
+
+  @property
+  def turn_budget(self):
+    return max(1, self.budget - self._system_tokens - self.summary_budget)
+
+  @property
+  def prompt_tokens(self):
+    """Estimated size of the rendered prompt."""
+    return self.count_tokens(self.prefix) + self.turn_tokens
+
+  def history(self):
+    """Recent verbatim turns as (role, message) tuples."""
+    return [(role, message) for role, message, _, _ in self.turns]
+
+  # ---------- folding ----------
+  def _fold(self):
+    target = int(self.turn_budget * self.low_watermark)
+    evicted = []
+    # Always keep the newest turn verbatim, even if it alone is over budget
+    while len(self.turns) > 1 and self.turn_tokens > target:
+      role, message, _, tokens = self.turns.popleft()
+      self.turn_tokens -= tokens
+      evicted.append((role, message))
+    if not evicted:
+      return
+    self.summary = self._fit_summary(self.summarize(self.summary, evicted))
+    self.folded_turns += len(evicted)
+    self._prefix = None
+    self._text = None
+
+  def _fit_summary(self, summary):
+    # Trim from the front (oldest facts) until the summary fits its budget
+    summary = summary.strip()
+    while summary and self.count_tokens(summary) > self.summary_budget:
+      summary = summary[len(summary) // 8 + 1:]
+    return summary
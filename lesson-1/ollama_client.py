@@ -0,0 +1,161 @@
+## Shared Ollama client for the lesson-1 chatbots ##
+"""
+Talks to the Ollama HTTP API instead of spawning `ollama run` for every message.
+
+One `ollama.Client` (sync) and one `ollama.AsyncClient` are created lazily and
+reused, so every turn goes over the same pooled keep-alive connection and the
+model stays loaded between turns (see `KEEP_ALIVE`).
+
+Usage:
+    from ollama_client import ask_ollama, ask_ollama_async
+
+    reply = ask_ollama("Hello how are you?")
+    reply = await ask_ollama_async("Hello how are you?")
+
+    stats = TurnStats()
+    for text in stream_ollama("Hello", stats=stats):
+      print(text, end="", flush=True)
+
+Reasoning ("thinking") is switched off at request time by default (`THINK`),
+so qwen3 does not spend tokens on a trace we would throw away. Override it per
+call with `think=True`.
+
+lesson-2/ollama_client.py is a trimmed standalone copy for the trivia bots;
+`measure_thinking_savings` exists in both, so fix it in both.
+"""
+
+import os
+import re
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+
+from ollama import AsyncClient, Client, ResponseError
+
+MODEL = os.getenv("OLLAMA_MODEL", "qwen3:4b")
+OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434")
+# How long Ollama keeps the model in memory after a request ("30m", "1h", -1 = forever)
+KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+TIMEOUT = float(os.getenv("OLLAMA_TIMEOUT", "300"))
+# Let thinking models (qwen3) reason before answering? Off: we only want the reply
+THINK = os.getenv("OLLAMA_THINK", "false").lower() in ("1", "true", "yes")
+# Context window (num_ctx) Ollama uses when the model does not set one; follow the
+# server's OLLAMA_CONTEXT_LENGTH if you changed it there
+DEFAULT_NUM_CTX = int(os.getenv("OLLAMA_CONTEXT_LENGTH", "2048"))
+
+_client = None
+_async_client = None
+
+
+def get_client():
+  """Return the shared sync client (created on first use)."""
+  global _client
+  if _client is None:
+    _client = Client(host=OLLAMA_HOST, timeout=TIMEOUT)
+  return _client
+
+
+def get_async_client():
+  """Return the shared async client (created on first use)."""
+  global _async_client
+  if _async_client is None:
+    _async_client = AsyncClient(host=OLLAMA_HOST, timeout=TIMEOUT)
+  return _async_client
+
+
+def _think(think):
+  return THINK if think is None else think
+
+
+def ask_ollama(prompt, model=MODEL, think=None):
+  """Send one prompt to the model and return the reply text.
+
+  Drop-in replacement for the subprocess based `ask_ollama(prompt)`.
+  think: None uses the module default (`THINK`), True/False overrides it.
+  """
+  response = get_client().generate(model=model, prompt=prompt, think=_think(think), keep_alive=KEEP_ALIVE)
+  return response.response.strip()
+
+
+async def ask_ollama_async(prompt, model=MODEL, think=None):
+  """Async version of `ask_ollama` (shares one pooled async connection)."""
+  response = await get_async_client().generate(model=model, prompt=prompt, think=_think(think), keep_alive=KEEP_ALIVE)
+  return response.response.strip()
+
+
+@lru_cache(maxsize=None)
+def context_window(model=MODEL):
+  """Tokens the model actually runs with: its `num_ctx` parameter or DEFAULT_NUM_CTX.
+
+  Ollama silently drops the oldest tokens of anything longer than this.
+  """
+  try:
+    parameters = get_client().show(model).parameters or ""
+  except (ResponseError, ConnectionError):
+    return DEFAULT_NUM_CTX
+  match = re.search(r"^num_ctx\s+(\d+)", parameters, re.MULTILINE)
+  return int(match.group(1)) if match else DEFAULT_NUM_CTX
+
+
+@dataclass
+class TurnStats:
+  """Timing for one streamed turn (filled in by `stream_ollama`)."""
+  ttft: float = 0.0          # seconds until the first reply token
+  total: float = 0.0         # seconds until the stream finished
+  tokens: int = 0            # generated tokens reported by Ollama (eval_count)
+  tokens_per_sec: float = 0.0
+  prompt_tokens: int = 0     # tokens the model had to prefill (prompt_eval_count)
+  prefill_seconds: float = 0.0
+  context: list = None       # KV context returned by Ollama, reusable on the next turn
+
+  def summary(self):
+    return (f"ttft {self.ttft:.2f}s | prefill {self.prompt_tokens} tokens | "
+            f"{self.tokens} tokens | {self.tokens_per_sec:.1f} tok/s | total {self.total:.2f}s")
+
+
+def stream_ollama(prompt, model=MODEL, stats=None, context=None, think=None):
+  """Yield reply text chunks as the model generates them.
+
+  Pass a `TurnStats` to get time-to-first-token and tokens/sec for the turn.
+  Pass the `context` from a previous turn's stats to continue that conversation
+  without sending it again.
+  """
+  stats = stats if stats is not None else TurnStats()
+  start = time.perf_counter()
+  stream = get_client().generate(model=model, prompt=prompt, context=context, think=_think(think),
+                                 stream=True, keep_alive=KEEP_ALIVE)
+  for chunk in stream:
+    if chunk.response:
+      if not stats.ttft:
+        stats.ttft = time.perf_counter() - start
+      yield chunk.response
+    if chunk.done:
+      stats.tokens = chunk.eval_count or 0
+      if chunk.eval_duration:
+        stats.tokens_per_sec = stats.tokens / (chunk.eval_duration / 1e9)
+      stats.prompt_tokens = chunk.prompt_eval_count or 0
+      stats.prefill_seconds = (chunk.prompt_eval_duration or 0) / 1e9
+      stats.context = chunk.context
+  stats.total = time.perf_counter() - start
+
+
+def measure_thinking_savings(prompt, model=MODEL):
+  """Run the same prompt with and without thinking and report what was saved.
+
+  The "thinking" run is what the bots used to pay for: the full reasoning trace
+  is generated and then stripped afterwards.
+  """
+  runs = {}
+  for think in (True, False):
+    start = time.perf_counter()
+    response = get_client().generate(model=model, prompt=prompt, think=think, keep_alive=KEEP_ALIVE)
+    runs[think] = (response.eval_count or 0, time.perf_counter() - start)
+  (tokens_on, secs_on), (tokens_off, secs_off) = runs[True], runs[False]
+  return {
+    "tokens_with_thinking": tokens_on,
+    "tokens_without_thinking": tokens_off,
+    "tokens_saved": tokens_on - tokens_off,
+    "seconds_with_thinking": secs_on,
+    "seconds_without_thinking": secs_off,
+    "seconds_saved": secs_on - secs_off,
+  }
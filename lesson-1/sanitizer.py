@@ -0,0 +1,184 @@
+## Streaming-safe cleanup of model output ##
+"""
+Removes reasoning / "thinking" text from model output while it streams.
+
+All markers are compiled into ONE regular expression, so checking a chunk costs
+the same whether there are 5 markers or 500. Text is consumed chunk by chunk and
+clean text is released with bounded lookahead:
+
+- a line that contains a line marker (e.g. "Hmm, the user just") is dropped,
+  as are empty lines and lines starting with "*" (actions);
+- blocks such as "<think> ... </think>" or "Thinking... ...done thinking."
+  are dropped completely, even across lines;
+- a line is held back until it is complete OR longer than `lookahead`
+  characters. After that it is released as it arrives (minus a tail as long as
+  the longest marker), and a marker found later only cuts the line from there.
+
+Usage:
+    sanitizer = StreamSanitizer()
+    for chunk in stream:
+      print(sanitizer.feed(chunk), end="", flush=True)
+    print(sanitizer.flush())
+
+    sanitize("whole response")   # one-shot version (same rules)
+
+The streamed text can differ from `sanitize` on the whole response: part of a
+line that was already released stays on screen when a marker shows up later in
+it. Store `sanitize(full_reply)` (memory, history), not the streamed text.
+"""
+
+import re
+
+# Known 'thinking' lines or reasoning markers (qwen3)
+LINE_MARKERS = [
+  "Hmm, the user just",  # Common Qwen reasoning lead
+  "I need to respond",
+  "Since they're greeting me",
+  "No need to add anything else",
+  "Just the phrase",
+  "#",
+  "checks requirements again",
+  "...done thinking.",
+]
+
+# (open, close) pairs whose whole content is dropped
+BLOCKS = [
+  ("<think>", "</think>"),
+  ("Thinking...", "...done thinking."),
+]
+
+# Line states
+_START, _EMITTING, _DROPPING, _BLOCK = range(4)
+
+
+class StreamSanitizer:
+  """Incremental filter: feed() chunks in, get clean text out."""
+
+  def __init__(self, line_markers=LINE_MARKERS, blocks=BLOCKS, drop_prefixes=("*",),
+               strip_prefix=None, lookahead=32):
+    """
+    line_markers:  substrings that drop the line they appear in
+    blocks:        (open, close) pairs dropped with everything between them
+    drop_prefixes: lines starting with these (after indentation) are dropped
+    strip_prefix:  removed from the start of the output once (e.g. "Bot:")
+    lookahead:     max characters of an unfinished line held back before release
+    """
+    self._blocks = dict(blocks)
+    self._line_markers = set(line_markers)
+    markers = sorted(set(line_markers) | set(self._blocks), key=len, reverse=True)
+    self._matcher = re.compile("|".join(re.escape(m) for m in markers))
+    self._hold = max((len(m) for m in markers), default=1) - 1
+    self.drop_prefixes = tuple(drop_prefixes)
+    self.strip_prefix = strip_prefix
+    self.lookahead = max(lookahead, self._hold + 1)
+
+    self._buf = ""
+    self._state = _START
+    self._closer = None
+    self._started = False   # any text emitted yet?
+
+  # ---------- public API ----------
+  def feed(self, chunk):
+    """Consume one chunk; return the clean text that is safe to show now."""
+    self._buf += chunk
+    out = []
+    while self._step(out):
+      pass
+    return "".join(out)
+
+  def flush(self):
+    """End of stream: release whatever is still held back."""
+    out = []
+    if self._state == _START:
+      self._decide_line(self._buf, out, newline=False)
+    elif self._state == _EMITTING:
+      out.append(self._buf)
+    self._buf = ""
+    self._state = _START
+    return "".join(out)
+
+  # ---------- internals ----------
+  def _step(self, out):
+    """Process as much of the buffer as possible; True if it should run again."""
+    buf = self._buf
+    if self._state == _BLOCK:
+      end = buf.find(self._closer)
+      if end < 0:
+        # Keep only a tail that might be the start of the closing marker
+        self._buf = buf[-(len(self._closer) - 1):] if len(self._closer) > 1 else ""
+        return False
+      self._buf = buf[end + len(self._closer):]
+      self._state = _START
+      return True
+
+    match = self._matcher.search(buf)
+    newline = buf.find("\n")
+    if match and (newline < 0 or match.start() < newline):
+      marker = match.group()
+      before = buf[:match.start()]
+      if marker in self._blocks:
+        # Block opens: what came before it is the end of a line
+        if self._state == _START:
+          self._decide_line(before, out, newline=False)
+        elif self._state == _EMITTING:
+          out.append(before)
+        self._buf = buf[match.end():]
+        self._state, self._closer = _BLOCK, self._blocks[marker]
+        return True
+      if marker in self._line_markers:
+        if self._state == _EMITTING:
+          out.append(before.rstrip())  # already showing: cut the line here
+        self._buf = buf[match.end():]
+        self._state = _DROPPING
+        return True
+
+    if newline >= 0:
+      line = buf[:newline]
+      if self._state == _START:
+        self._decide_line(line, out, newline=True)
+      elif self._state == _EMITTING:
+        out.append(line + "\n")
+      self._buf = buf[newline + 1:]
+      self._state = _START
+      return True
+
+    # No newline yet: decide how much of the unfinished line can be released
+    if self._state == _DROPPING:
+      self._buf = ""
+    elif self._state == _START and len(buf) > self.lookahead:
+      if buf.lstrip().startswith(self.drop_prefixes):
+        self._state = _DROPPING
+        self._buf = ""
+      else:
+        self._state = _EMITTING
+        self._release(self._strip_output_prefix(buf), out)
+    elif self._state == _EMITTING:
+      self._release(buf, out)
+    return False
+
+  def _release(self, text, out):
+    cut = len(text) - self._hold
+    if cut > 0:
+      out.append(text[:cut])
+      self._started = True
+    self._buf = text[max(cut, 0):]
+
+  def _decide_line(self, line, out, newline):
+    line = self._strip_output_prefix(line)
+    if not line.strip() or line.lstrip().startswith(self.drop_prefixes):
+      return
+    out.append(line + "\n" if newline else line)
+    self._started = True
+
+  def _strip_output_prefix(self, text):
+    if self.strip_prefix and not self._started:
+      stripped = text.lstrip()
+      if stripped.startswith(self.strip_prefix):
+        return stripped[len(self.strip_prefix):].lstrip()
+    return text
+
+
+def sanitize(text, **options):
+  """One-shot cleanup with the same rules as StreamSanitizer."""
+  sanitizer = StreamSanitizer(**options)
+  return (sanitizer.feed(text) + sanitizer.flush()).strip()
@@ -0,0 +1,141 @@
+## Multi-turn session that reuses Ollama's KV context between turns ##
+"""
+Ollama returns a `context` (the conversation as model tokens) with every
+generate call. Sending it back with the next request lets the model continue
+from there, so each turn only needs the *new* user message instead of the
+whole transcript.
+
+The caller's memory stays the source of truth. The session falls back to a
+full replay of the prompt the caller builds (e.g. `ConversationMemory.render`)
+whenever the context no longer matches it:
+
+- there is no context yet, or Ollama rejected it
+- it grew past the limit: the model's real context window (minus room for the
+  new turn and reply) and `max_context`, e.g. the memory's token budget
+- the caller's `version` changed, e.g. old turns were folded into the summary
+- the stored (filtered) reply lost content the model generated, see `keep()`
+
+Usage:
+    session = ChatSession(max_context=memory.budget)
+    memory.add("user", text)
+    for chunk in session.stream(memory.render_last_turn(), memory.render, version=memory.folded_turns):
+      print(chunk, end="")
+    session.keep(reply)  # the cleaned reply that goes into memory
+    print(session.stats.summary())
+"""
+
+from dataclasses import dataclass
+
+from ollama import ResponseError
+
+import ollama_client
+
+# Tokens of the context window kept free for the new message and the reply
+REPLY_RESERVE = 512
+
+
+def content_lines(text, prefix="Bot:"):
+  """Non-blank lines of a reply, without a leading `prefix` (what a replay would contain)."""
+  text = text.strip()
+  if prefix and text.startswith(prefix):
+    text = text[len(prefix):]
+  return [line.strip() for line in text.splitlines() if line.strip()]
+
+
+@dataclass
+class SessionStats:
+  """Running counters to compare context reuse against full replay."""
+  turns: int = 0
+  context_turns: int = 0       # turns that only sent the new message
+  replays: int = 0             # turns that re-sent the whole conversation
+  prefill_tokens: int = 0      # total prompt tokens the model had to process
+  prefill_seconds: float = 0.0
+  latency_seconds: float = 0.0
+  last_prefill_tokens: int = 0
+  last_latency: float = 0.0
+
+  def summary(self):
+    avg_prefill = self.prefill_tokens / self.turns if self.turns else 0
+    avg_latency = self.latency_seconds / self.turns if self.turns else 0
+    return (f"{self.turns} turns ({self.context_turns} with context, {self.replays} replays) | "
+            f"prefill {self.prefill_tokens} tokens ({avg_prefill:.0f}/turn, {self.prefill_seconds:.2f}s) | "
+            f"avg latency {avg_latency:.2f}s")
+
+
+class ChatSession:
+  """Keeps the model's conversation context and sends only new turns."""
+
+  def __init__(self, model=ollama_client.MODEL, max_context=None, think=None):
+    """max_context: optional cap (tokens) for the reused context, e.g. the memory budget."""
+    self.model = model
+    self.think = think
+    self.max_context = max_context
+    self.context = None
+    self.version = None
+    self.last_reply = ""           # raw text the model generated last turn
+    self.stats = SessionStats()
+
+  @property
+  def context_limit(self):
+    """Largest context that is still reused (never more than the model's window allows)."""
+    limit = ollama_client.context_window(self.model) - REPLY_RESERVE
+    return min(limit, self.max_context) if self.max_context else limit
+
+  def reset(self):
+    """Forget the context; the next turn does a full replay."""
+    self.context = None
+
+  def keep(self, reply, prefix="Bot:"):
+    """
+    Keep the context unless `reply`, the text stored as this turn's answer, lost
+    real content of the generated one (e.g. reasoning lines the sanitizer cut).
+    Blank lines, surrounding whitespace and a leading `prefix` do not count.
+    """
+    if content_lines(reply, prefix) != content_lines(self.last_reply, prefix):
+      self.reset()
+
+  def stream(self, new_text, replay, turn_stats=None, version=None):
+    """
+    Yield reply chunks for one turn.
+
+    new_text:   the new turn only (e.g. "User: hi\\nBot:")
+    replay:     fn() -> full prompt, used when there is no usable context
+    turn_stats: optional ollama_client.TurnStats for this turn
+    version:    changes whenever `replay()` no longer extends the previous turns
+                (e.g. memory.folded_turns); a new value forces a replay
+    """
+    turn_stats = turn_stats if turn_stats is not None else ollama_client.TurnStats()
+    if version != self.version:
+      self.reset()
+      self.version = version
+    if self.context and len(self.context) < self.context_limit:
+      try:
+        yield from self._run(new_text, self.context, turn_stats)
+        self.stats.context_turns += 1
+        return
+      except ResponseError:
+        # Context rejected (model changed / reloaded with another size): replay
+        if turn_stats.ttft:
+          raise
+        self.context = None
+    yield from self._run(replay(), None, turn_stats)
+    self.stats.replays += 1
+
+  def ask(self, new_text, replay):
+    """Non-streaming helper: returns the full reply text."""
+    return "".join(self.stream(new_text, replay)).strip()
+
+  def _run(self, prompt, context, turn_stats):
+    pieces = []
+    for text in ollama_client.stream_ollama(prompt, model=self.model, stats=turn_stats, context=context,
+                                            think=self.think):
+      pieces.append(text)
+      yield text
+    self.last_reply = "".join(pieces)
+    self.context = turn_stats.context
+    self.stats.turns += 1
+    self.stats.prefill_tokens += turn_stats.prompt_tokens
+    self.stats.prefill_seconds += turn_stats.prefill_seconds
+    self.stats.latency_seconds += turn_stats.total
+    self.stats.last_prefill_tokens = turn_stats.prompt_tokens
+    self.stats.last_latency = turn_stats.total
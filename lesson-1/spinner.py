@@ -0,0 +1,52 @@
+## Terminal spinner that runs only while we wait for the model ##
+
+import itertools
+import sys
+import threading
+
+
+class Spinner:
+  """Animated "Bot is thinking" line on a background thread.
+
+  Use as a context manager around a blocking call, or call `start()` / `stop()`
+  yourself (e.g. stop as soon as the first streamed token arrives).
+  """
+
+  def __init__(self, message="Bot is thinking", interval=0.1):
+    self.message = message
+    self.interval = interval
+    self._stop = threading.Event()
+    self._thread = None
+
+  @property
+  def running(self):
+    return self._thread is not None
+
+  def start(self):
+    if self._thread is None:
+      self._stop.clear()
+      self._thread = threading.Thread(target=self._spin, daemon=True)
+      self._thread.start()
+    return self
+
+  def stop(self):
+    if self._thread is not None:
+      self._stop.set()
+      self._thread.join()
+      self._thread = None
+      # Clear the spinner line so the reply starts on a clean line
+      sys.stdout.write("\r" + " " * (len(self.message) + 4) + "\r")
+      sys.stdout.flush()
+
+  def _spin(self):
+    for frame in itertools.cycle("|/-\\"):
+      sys.stdout.write(f"\r{frame} {self.message}...")
+      sys.stdout.flush()
+      if self._stop.wait(self.interval):
+        break
+
+  def __enter__(self):
+    return self.start()
+
+  def __exit__(self, *exc):
+    self.stop()
@@ -1,45 +1,29 @@
 ## A simple trivia ##
 
-import subprocess
-import time
+import ollama_client
 
-# loader function
+# loader function (no artificial delay: the answer arrives as soon as the model is done)
 def loading_indicator():
   print("Bot is thinking:")
   print(f"Loading...")
   print()  # new line
-  for i in range(0, 101, 20): #increment of 20%
-    time.sleep(0.3)
 
 
-def ask_ollama(prompt):
-  """Ask the local Ollama model (no internet needed)."""
+def ask_ollama(prompt, think=None):
+  """Ask the local Ollama model (no internet needed).
+
+  Reasoning is turned off at request time (see ollama_client.THINK);
+  pass think=True to let the model reason for this call.
+  """
 
   # System prompt: behave as a trivia expert #
   system_instruction = """ You are a trivia expert.  Answer questions briefly and accurately in plain text. Do NOT include reasoning or thought process. """
 
   # Combine system prompt + user input #
   full_prompt = system_instruction + f"\n Question: {prompt} \nAnswer:"
-  
-  loading_indicator()  # show loading first
-  #Run ollama CLT with subprocess
-  result = subprocess.run(
-    ["ollama", "run", "qwen3:4b"],
-    input=prompt.encode("utf-8"),
-    capture_output=True,
-  )
-
-  output = result.stdout.decode("utf-8").strip()
-
-  # ✅ Keep only the text after "...done thinking."
-  if "...done thinking." in output:
-    output = output.split("...done thinking.", 1)[1].strip()
-
-  return output
-
 
-  # Decode from bytes → string and return
-  return result.stdout.decode("utf-8").strip()
+  # Ask over the shared HTTP connection; no thinking trace to strip afterwards
+  return ollama_client.generate(full_prompt, think=think)
 
 
 def trivia_chat():
@@ -52,6 +36,7 @@ def trivia_chat():
       print("Bot: Says good bye")
       break
 
+    loading_indicator()  # show loading first
     response = ask_ollama(user_input)
     print("Bot:", response, "\n")
 
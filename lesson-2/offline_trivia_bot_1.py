@@ -1,41 +1,56 @@
 ## A simple trivia ##
 
-import subprocess
-import time
+import argparse
+import threading
 
-# loader function
+import ollama_client
+from trivia_cache import TriviaCache
+
+# Answers are cached on disk (see trivia_cache.py); created on first use
+_cache = None
+_cache_lock = threading.Lock()  # trivia_batch calls get_cache() from many threads
+NEAR_DUPLICATES = False
+
+
+def get_cache():
+  global _cache
+  if _cache is None:
+    with _cache_lock:
+      if _cache is None:
+        _cache = TriviaCache(near_duplicates=NEAR_DUPLICATES)
+  return _cache
+
+
+# loader function (no artificial delay: the answer arrives as soon as the model is done)
 def loading_indicator():
   print("\n")
   print("Bot is thinking:")
   print("\n")
   print(f"Loading...")
   print("\n")
-  for i in range(0, 101, 20): #increment of 20%
-    time.sleep(0.3)
 
 
-def ask_ollama(category, question):
-  """Ask the local Ollama model (no internet needed)."""
+def ask_ollama(category, question, think=None, use_cache=True):
+  """Ask the local Ollama model (no internet needed).
+
+  Reasoning is turned off at request time (see ollama_client.THINK);
+  pass think=True to let the model reason for this call.
+  Repeated questions are answered from the on-disk cache (use_cache=False to skip it).
+  """
+  think = ollama_client.THINK if think is None else think
+  if use_cache:
+    cached = get_cache().get(category, question, ollama_client.MODEL, think)
+    if cached is not None:
+      return cached
 
   # System prompt: behave as a trivia expert #
   prompt = f"You are a trivia expert. Answer this {category} question clearly and briefly:\n\n{question}"
-  
-  loading_indicator()  # show loading first
-  #Run ollama CLT with subprocess
-  result = subprocess.run(
-    ["ollama", "run", "qwen3:4b"],
-    input=prompt.encode("utf-8"),
-    capture_output=True,
-  )
 
-  output = result.stdout.decode("utf-8").strip()
-
-  # ✅ Keep only the text after "...done thinking."
-  if "...done thinking." in output:
-    output = output.split("...done thinking.", 1)[1].strip()
-
-# Decode from bytes → string and return
-  return output
+  # Ask over the shared HTTP connection; no thinking trace to strip afterwards
+  answer = ollama_client.generate(prompt, think=think)
+  if use_cache and answer:
+    get_cache().put(category, question, ollama_client.MODEL, answer, think)
+  return answer
 
 
 def trivia_chat():
@@ -44,7 +59,7 @@ def trivia_chat():
   print("\n")
   print("Categories: Science, History, Sports")
   print("\n")
-  print("Offline Trivia AI ready! Type 'exit' to quit.")
+  print("Offline Trivia AI ready! Type 'exit' to quit, 'stats' for cache stats.")
   print("\n")
 
   while True:
@@ -56,6 +71,11 @@ def trivia_chat():
         print("\n")
         break
 
+    if category == "stats":
+        print(get_cache().stats_text())
+        print("\n")
+        continue
+
     if category not in ["science", "history", "sports"]:
         print("Bot: Please choose a valid category (Science, History, Sports).")
         print("\n")
@@ -68,10 +88,26 @@ def trivia_chat():
         print("\n")
         break
 
+    loading_indicator()  # show loading first
     response = ask_ollama(category, question)
     print(f"Bot: ({category.capitalize()}): {response}\n")
 
+  print(get_cache().stats_text())
+
 # Run chatbot
 # “Only run this part if the file is executed directly, not when imported into another file.”
 if __name__ == "__main__":
-  trivia_chat()
\ No newline at end of file
+  parser = argparse.ArgumentParser(description="Offline trivia chatbot")
+  parser.add_argument("--cache-stats", action="store_true", help="print answer cache hit/miss stats and exit")
+  parser.add_argument("--clear-cache", action="store_true", help="delete all cached answers and exit")
+  parser.add_argument("--near-duplicates", action="store_true", help="also reuse answers of questions with the same content words")
+  args = parser.parse_args()
+  NEAR_DUPLICATES = args.near_duplicates
+
+  if args.clear_cache:
+    get_cache().clear()
+    print("Cache cleared.")
+  elif args.cache_stats:
+    print(get_cache().stats_text())
+  else:
+    trivia_chat()
\ No newline at end of file
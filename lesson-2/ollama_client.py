@@ -0,0 +1,94 @@
+## Shared Ollama client for the trivia bots ##
+"""
+Talks to the Ollama HTTP API over one pooled keep-alive connection (same client
+as lesson-1/ollama_client.py, trimmed to what the trivia bots need).
+
+Reasoning ("thinking") is switched off at request time by default (`THINK`), so
+qwen3 answers directly instead of generating a trace we would strip afterwards.
+Override it per call with `think=True`.
+
+    python ollama_client.py "Who painted the Mona Lisa?"   # report the savings
+
+`measure_thinking_savings` is shared with lesson-1/ollama_client.py (this
+lesson runs on its own, so it keeps its copy); fix it in both.
+"""
+
+import os
+import sys
+import time
+
+from ollama import AsyncClient, Client
+
+MODEL = os.getenv("OLLAMA_MODEL", "qwen3:4b")
+OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434")
+# How long Ollama keeps the model in memory after a request ("30m", "1h", -1 = forever)
+KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+TIMEOUT = float(os.getenv("OLLAMA_TIMEOUT", "300"))
+# Let thinking models (qwen3) reason before answering? Off: we only want the answer
+THINK = os.getenv("OLLAMA_THINK", "false").lower() in ("1", "true", "yes")
+
+_client = None
+_async_client = None
+
+
+def get_client():
+  """Return the shared sync client (created on first use)."""
+  global _client
+  if _client is None:
+    _client = Client(host=OLLAMA_HOST, timeout=TIMEOUT)
+  return _client
+
+
+def get_async_client():
+  """Return the shared async client (created on first use)."""
+  global _async_client
+  if _async_client is None:
+    _async_client = AsyncClient(host=OLLAMA_HOST, timeout=TIMEOUT)
+  return _async_client
+
+
+def _think(think):
+  return THINK if think is None else think
+
+
+def generate(prompt, model=MODEL, think=None):
+  """Send one prompt and return the answer text.
+
+  think: None uses the module default (`THINK`), True/False overrides it.
+  """
+  response = get_client().generate(model=model, prompt=prompt, think=_think(think), keep_alive=KEEP_ALIVE)
+  return response.response.strip()
+
+
+async def generate_async(prompt, model=MODEL, think=None):
+  """Async version of `generate` (shares one pooled async connection)."""
+  response = await get_async_client().generate(model=model, prompt=prompt, think=_think(think), keep_alive=KEEP_ALIVE)
+  return response.response.strip()
+
+
+def measure_thinking_savings(prompt, model=MODEL):
+  """Run the same prompt with and without thinking and report what was saved.
+
+  The "thinking" run is what the bots used to pay for: the full reasoning trace
+  is generated and then cut off at "...done thinking.".
+  """
+  runs = {}
+  for think in (True, False):
+    start = time.perf_counter()
+    response = get_client().generate(model=model, prompt=prompt, think=think, keep_alive=KEEP_ALIVE)
+    runs[think] = (response.eval_count or 0, time.perf_counter() - start)
+  (tokens_on, secs_on), (tokens_off, secs_off) = runs[True], runs[False]
+  return {
+    "tokens_with_thinking": tokens_on,
+    "tokens_without_thinking": tokens_off,
+    "tokens_saved": tokens_on - tokens_off,
+    "seconds_with_thinking": secs_on,
+    "seconds_without_thinking": secs_off,
+    "seconds_saved": secs_on - secs_off,
+  }
+
+
+if __name__ == "__main__":
+  question = " ".join(sys.argv[1:]) or "What is the capital of Australia?"
+  for key, value in measure_thinking_savings(question).items():
+    print(f"{key:<26} {value:10.2f}")
@@ -0,0 +1,175 @@
+## Batch trivia: answer a whole file of questions ##
+"""
+Runs a question file through the trivia bots with a bounded worker pool.
+
+Input (JSONL or CSV, chosen by file extension):
+    {"id": "q1", "category": "science", "question": "What is H2O?"}
+    id,category,question
+    q1,science,What is H2O?
+
+`id` is optional (the line number is used) and so is `category` (questions
+without one go to the general trivia bot). Results are appended to the output
+JSONL as soon as each question finishes; running the same command again skips
+the ids that already have an answer, so a crashed run simply resumes.
+
+    python trivia_batch.py questions.jsonl answers.jsonl --workers 4
+
+Tip: Ollama itself only answers OLLAMA_NUM_PARALLEL requests at a time,
+so start the server with e.g. OLLAMA_NUM_PARALLEL=4 to match --workers.
+"""
+
+import argparse
+import csv
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import offline_trivia_bot
+import offline_trivia_bot_1
+
+
+def read_questions(path):
+  """Yield question dicts (id, category, question) from a JSONL or CSV file."""
+  with open(path, newline="", encoding="utf-8") as f:
+    if path.lower().endswith(".csv"):
+      rows = csv.DictReader(f)
+    else:
+      rows = (json.loads(line) for line in f if line.strip())
+    for number, row in enumerate(rows, start=1):
+      question = (row.get("question") or "").strip()
+      if not question:
+        continue
+      yield {
+        "id": str(row.get("id") or number),
+        "category": (row.get("category") or "").strip().lower(),
+        "question": question,
+      }
+
+
+def finished_ids(path):
+  """Ids that already have an answer in the output file (for resuming)."""
+  done = set()
+  if os.path.exists(path):
+    with open(path, encoding="utf-8") as f:
+      for line in f:
+        try:
+          result = json.loads(line)
+        except json.JSONDecodeError:
+          continue  # half-written line from a crash
+        if "error" not in result:
+          done.add(result["id"])
+  return done
+
+
+def drop_partial_line(path):
+  """Cut a half-written last record (crash mid-write) so new records start on a fresh line."""
+  if not os.path.exists(path):
+    return
+  with open(path, "rb+") as f:
+    size = f.seek(0, os.SEEK_END)
+    if size == 0:
+      return
+    f.seek(size - 1)
+    if f.read(1) == b"\n":
+      return
+    # Scan back for the last complete line
+    end = size
+    while end > 0:
+      start = max(0, end - 4096)
+      f.seek(start)
+      newline = f.read(end - start).rfind(b"\n")
+      if newline >= 0:
+        f.truncate(start + newline + 1)
+        return
+      end = start
+    f.truncate(0)
+
+
+def answer(item):
+  """Answer one question and time it; errors are returned, not raised."""
+  start = time.perf_counter()
+  result = dict(item)
+  try:
+    if item["category"]:
+      result["answer"] = offline_trivia_bot_1.ask_ollama(item["category"], item["question"])
+    else:
+      result["answer"] = offline_trivia_bot.ask_ollama(item["question"])
+  except Exception as e:
+    result["error"] = f"{type(e).__name__}: {e}"
+  result["latency"] = round(time.perf_counter() - start, 4)
+  return result
+
+
+def percentile(values, pct):
+  if not values:
+    return 0.0
+  ordered = sorted(values)
+  index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+  return ordered[index]
+
+
+def run_batch(input_path, output_path, workers=4):
+  """Answer every pending question; returns a summary dict."""
+  drop_partial_line(output_path)
+  done = finished_ids(output_path)
+  latencies, failed, skipped = [], 0, 0
+  start = time.perf_counter()
+
+  with open(output_path, "a", encoding="utf-8") as out, ThreadPoolExecutor(max_workers=workers) as pool:
+    in_flight = set()
+
+    def collect(futures):
+      nonlocal failed
+      for future in futures:
+        result = future.result()
+        out.write(json.dumps(result, ensure_ascii=False) + "\n")
+        out.flush()
+        if "error" in result:
+          failed += 1
+        else:
+          latencies.append(result["latency"])
+        finished = len(latencies) + failed
+        if finished % 50 == 0:
+          print(f"  {finished} answered ({failed} failed)", flush=True)
+
+    # Keep only a few questions per worker in flight so huge files stay cheap in memory
+    for item in read_questions(input_path):
+      if item["id"] in done:
+        skipped += 1
+        continue
+      in_flight.add(pool.submit(answer, item))
+      if len(in_flight) >= workers * 2:
+        completed, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+        collect(completed)
+    collect(wait(in_flight).done)
+
+  elapsed = time.perf_counter() - start
+  answered = len(latencies)
+  return {
+    "skipped": skipped,
+    "answered": answered,
+    "failed": failed,
+    "seconds": round(elapsed, 2),
+    "throughput": round(answered / elapsed, 2) if elapsed else 0.0,
+    "p50": round(percentile(latencies, 50), 3),
+    "p95": round(percentile(latencies, 95), 3),
+  }
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("input", help="questions file (.jsonl or .csv)")
+  parser.add_argument("output", help="answers file (.jsonl), appended to and resumed from")
+  parser.add_argument("--workers", type=int, default=4, help="questions answered at the same time")
+  args = parser.parse_args()
+
+  summary = run_batch(args.input, args.output, workers=args.workers)
+  print(f"\nAnswered {summary['answered']} ({summary['failed']} failed, {summary['skipped']} already done) "
+        f"in {summary['seconds']}s")
+  print(f"Throughput: {summary['throughput']} questions/s | latency p50 {summary['p50']}s | p95 {summary['p95']}s")
+  print(offline_trivia_bot_1.get_cache().stats_text())
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,175 @@
+## On-disk answer cache for the trivia bot ##
+"""
+Trivia answers do not change, so repeated questions are answered from a local
+SQLite file instead of asking the model again.
+
+- Key: model, think setting and normalized (category, question): lower case,
+  no punctuation, single spaces. "Who wrote Hamlet" and "who wrote hamlet?"
+  share one entry; another model (or thinking on/off) gets its own answers.
+- LRU eviction: every hit refreshes `last_used`; once the cache holds more than
+  `max_entries` answers the least recently used ones are deleted.
+- Optional near-duplicate lookup (off by default, `near_duplicates=True`):
+  questions with the same content words in the same order, ignoring filler
+  words, e.g. "Who wrote Hamlet" and "Who was it that wrote Hamlet?". Every
+  other word has to match exactly, so "capital of Austria" never returns the
+  answer for "capital of Australia", nor "World War 1" the one for "World War
+  2", and order keeps "did the dog bite the man" apart from "did the man bite
+  the dog". Questions with fewer than MIN_NEAR_TERMS content words ("Was it?")
+  only match exactly. It does not catch real rewordings ("Who was the writer
+  of Hamlet").
+- Hit / miss counters are stored in the same file, so they survive restarts.
+
+Usage:
+    cache = TriviaCache()
+    answer = cache.get("history", "Who was the first US president?", "qwen3:4b")
+    if answer is None:
+      answer = ask_model(...)
+      cache.put("history", "Who was the first US president?", "qwen3:4b", answer)
+    print(cache.stats_text())
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+
+# Next to this file, wherever the bot is started from
+CACHE_PATH = os.getenv("TRIVIA_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                         "trivia_cache.sqlite3"))
+MAX_ENTRIES = int(os.getenv("TRIVIA_CACHE_MAX_ENTRIES", "5000"))
+
+# Words that do not change what a question asks (ignored by the near-duplicate lookup)
+FILLER_WORDS = {
+  "a", "an", "the", "of", "is", "was", "were", "are", "be", "been", "did", "does", "do",
+  "it", "its", "s", "this", "that", "please", "tell", "me", "can", "you", "i",
+}
+# Fewer content words than this: too little left to call two questions the same
+MIN_NEAR_TERMS = 2
+# Format of the stored `terms` column (PRAGMA user_version); rows are recomputed on change
+TERMS_VERSION = 2
+
+
+def normalize(text):
+  """Lower case, drop punctuation and collapse whitespace."""
+  text = re.sub(r"[^\w\s]", " ", text.lower())
+  return " ".join(text.split())
+
+
+def content_terms(key):
+  """Content words of a normalized question, in order: "who was it that wrote hamlet" -> "who wrote hamlet"."""
+  return " ".join(word for word in key.split() if word not in FILLER_WORDS)
+
+
+class TriviaCache:
+  """SQLite-backed LRU cache of trivia answers (safe to share between threads)."""
+
+  def __init__(self, path=CACHE_PATH, max_entries=MAX_ENTRIES, near_duplicates=False):
+    self.path = path
+    self.max_entries = max_entries
+    self.near_duplicates = near_duplicates
+    self._lock = threading.Lock()
+    self._db = sqlite3.connect(path, check_same_thread=False)
+    columns = [row[1] for row in self._db.execute("PRAGMA table_info(answers)")]
+    if columns and "model" not in columns:
+      self._db.execute("DROP TABLE answers")  # cache file from before answers were keyed by model
+    self._db.executescript("""
+      CREATE TABLE IF NOT EXISTS answers (
+        model TEXT NOT NULL,
+        think INTEGER NOT NULL,
+        category TEXT NOT NULL,
+        question TEXT NOT NULL,
+        terms TEXT NOT NULL,
+        answer TEXT NOT NULL,
+        last_used REAL NOT NULL,
+        PRIMARY KEY (model, think, category, question)
+      );
+      CREATE INDEX IF NOT EXISTS answers_last_used ON answers (last_used);
+      CREATE INDEX IF NOT EXISTS answers_terms ON answers (model, think, category, terms);
+      CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+    """)
+    if self._db.execute("PRAGMA user_version").fetchone()[0] != TERMS_VERSION:
+      # Terms written by an older content_terms (sorted words): recompute them
+      rows = self._db.execute("SELECT rowid, question FROM answers").fetchall()
+      self._db.executemany("UPDATE answers SET terms = ? WHERE rowid = ?",
+                           [(content_terms(question), rowid) for rowid, question in rows])
+      self._db.execute(f"PRAGMA user_version = {TERMS_VERSION}")
+    self._db.commit()
+
+  # ---------- lookups ----------
+  def get(self, category, question, model, think=False):
+    """Return the answer `model` gave with this think setting, or None (counts a hit or a miss)."""
+    scope = (model, int(bool(think)), normalize(category))
+    key = normalize(question)
+    with self._lock:
+      row = self._db.execute(
+        "SELECT question, answer FROM answers WHERE model = ? AND think = ? AND category = ? AND question = ?",
+        (*scope, key),
+      ).fetchone()
+      stat = "hits"
+      terms = content_terms(key)
+      if row is None and self.near_duplicates and len(terms.split()) >= MIN_NEAR_TERMS:
+        row = self._db.execute(
+          "SELECT question, answer FROM answers WHERE model = ? AND think = ? AND category = ? AND terms = ? "
+          "ORDER BY last_used DESC LIMIT 1",
+          (*scope, terms),
+        ).fetchone()
+        stat = "near_hits"
+      if row is None:
+        self._bump("misses")
+        self._db.commit()
+        return None
+      self._db.execute(
+        "UPDATE answers SET last_used = ? WHERE model = ? AND think = ? AND category = ? AND question = ?",
+        (time.time(), *scope, row[0]),
+      )
+      self._bump(stat)
+      self._db.commit()
+      return row[1]
+
+  # ---------- updates ----------
+  def put(self, category, question, model, answer, think=False):
+    """Store an answer and evict the least recently used ones above the size cap."""
+    key = normalize(question)
+    with self._lock:
+      self._db.execute(
+        "INSERT OR REPLACE INTO answers (model, think, category, question, terms, answer, last_used) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (model, int(bool(think)), normalize(category), key, content_terms(key), answer, time.time()),
+      )
+      overflow = self._db.execute("SELECT COUNT(*) FROM answers").fetchone()[0] - self.max_entries
+      if overflow > 0:
+        self._db.execute(
+          "DELETE FROM answers WHERE rowid IN (SELECT rowid FROM answers ORDER BY last_used LIMIT ?)", (overflow,)
+        )
+        self._bump("evictions", overflow)
+      self._db.commit()
+
+  def clear(self):
+    with self._lock:
+      self._db.execute("DELETE FROM answers")
+      self._db.execute("DELETE FROM stats")
+      self._db.commit()
+
+  # ---------- stats ----------
+  def _bump(self, name, amount=1):
+    self._db.execute(
+      "INSERT INTO stats (name, value) VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value = value + ?",
+      (name, amount, amount),
+    )
+
+  def stats(self):
+    with self._lock:
+      values = dict(self._db.execute("SELECT name, value FROM stats"))
+      values["entries"] = self._db.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+    for name in ("hits", "near_hits", "misses", "evictions"):
+      values.setdefault(name, 0)
+    lookups = values["hits"] + values["near_hits"] + values["misses"]
+    values["hit_rate"] = (values["hits"] + values["near_hits"]) / lookups if lookups else 0.0
+    return values
+
+  def stats_text(self):
+    s = self.stats()
+    return (f"Cache: {s['entries']}/{self.max_entries} answers | hits {s['hits']} | "
+            f"near hits {s['near_hits']} | misses {s['misses']} | "
+            f"hit rate {s['hit_rate']:.0%} | evictions {s['evictions']}")
@@ -1,3 +1,9 @@
+import asyncio
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 import gradio as gr
 # Import ChatOllama wrapper for the Ollama LLM models
 from langchain_ollama import ChatOllama
@@ -5,37 +11,151 @@ from langchain_ollama import ChatOllama
 # Import LangChain prompt and chain components
 from langchain.prompts import PromptTemplate
 
+# Response cache + coalescing of identical concurrent requests
+from llm_cache import CachedLLM, response_text
+from model_limits import Overloaded, configure, gradio_queue_settings
+
 # Load the custom prompt template from file
 with open("prompts/tone_prompt_template_gradio.txt", "r") as f:
     template = f.read()
 
-# Intialize the local Ollama model
-llm = ChatOllama(model="qwen3:4b")
+with open("prompts/structured_tone_prompt_template.txt", "r") as f:
+    structured_template = f.read()
+
+MODEL = "qwen3:4b"
+
+# How many model calls run at the same time, in both paths: the worker pool of the
+# sync iter_tones and the model's async limit (model_limits.py) used by Gradio.
+# Ollama only runs OLLAMA_NUM_PARALLEL requests at once, so start it with a matching value.
+TONE_PARALLELISM = int(os.getenv("TONE_PARALLELISM", "5"))
+# One pool for every request, so concurrent users share the same TONE_PARALLELISM workers
+tone_pool = ThreadPoolExecutor(max_workers=max(1, TONE_PARALLELISM), thread_name_prefix="tone")
+configure(MODEL, max_concurrency=max(1, TONE_PARALLELISM))
+
+# Intialize the local Ollama model (behind the shared response cache)
+llm = CachedLLM(ChatOllama(model=MODEL))
+# Same model constrained to valid JSON output, for the single-call mode
+json_llm = CachedLLM(ChatOllama(model=MODEL, format="json"))
 
 # Build the prompt template for the LLM
 prompt = PromptTemplate(input_variables=["sentence", "tone"], template=template)
+structured_prompt = PromptTemplate(input_variables=["sentence", "tones"], template=structured_template)
 
 tones = ["formal", "casual", "friendly", "funny", "persuasive"]
 
+MODES = ["Per tone (parallel)", "Single call (structured)"]
+
+def invoke_text(model, text, usage=None):
+  """Call the model and return the text; appends total tokens to `usage` if given."""
+  response = model.invoke(text)
+  metadata = getattr(response, "usage_metadata", None)
+  if usage is not None and metadata:
+    usage.append(metadata["total_tokens"])
+  return response_text(response)
+
+def generate_tone(sentence, tone, usage=None):
+  formatted_prompt = prompt.format(sentence=sentence, tone=tone)
+  return invoke_text(llm, formatted_prompt, usage)
+
+def generate_tones_serial(sentence):
+  """One tone after the other (the original loop, kept for comparison)."""
+  return {tone.capitalize(): generate_tone(sentence, tone) for tone in tones}
+
+def iter_tones(sentence, only=None, usage=None):
+  """Generate tones concurrently on `tone_pool`; yields (tone, text) as each one finishes.
+
+  only: subset of tones to generate (default: all)
+  """
+  futures = {tone_pool.submit(generate_tone, sentence, tone, usage): tone for tone in (only or tones)}
+  try:
+    for future in as_completed(futures):
+      yield futures[future], future.result()
+  finally:
+    for future in futures:
+      future.cancel()  # consumer stopped early: drop the tones that have not started
+
 def generate_tones(sentence):
-  results = {}
-  for tone in tones:
-    formatted_prompt = prompt.format(sentence=sentence, tone=tone)
-    response = llm.invoke(formatted_prompt)
-    results[tone.capitalize()] = response
-  return results
+  results = dict(iter_tones(sentence))
+  return {tone.capitalize(): results[tone] for tone in tones}
+
+def parse_structured_tones(text):
+  """Pull {tone: text} out of the model's JSON reply; unknown/empty tones are left out."""
+  text = re.sub(r"<think>.*?</think>", "", text, flags=re.DOTALL)
+  start, end = text.find("{"), text.rfind("}")
+  if start < 0 or end <= start:
+    return {}
+  try:
+    data = json.loads(text[start:end + 1])
+  except json.JSONDecodeError:
+    return {}
+  if not isinstance(data, dict):
+    return {}
+  found = {str(key).strip().lower(): value for key, value in data.items()}
+  return {tone: found[tone].strip() for tone in tones if isinstance(found.get(tone), str) and found[tone].strip()}
+
+def iter_tones_structured(sentence, usage=None, fallbacks=None):
+  """Ask for every tone in one structured call; yields (tone, text).
+
+  Tones missing from the reply (or all of them, if it cannot be parsed) are
+  generated with per-tone calls afterwards and appended to `fallbacks` if given.
+  """
+  formatted_prompt = structured_prompt.format(sentence=sentence, tones=", ".join(tones))
+  results = parse_structured_tones(invoke_text(json_llm, formatted_prompt, usage))
+  yield from results.items()
+  missing = [tone for tone in tones if tone not in results]
+  if fallbacks is not None:
+    fallbacks.extend(missing)
+  if missing:
+    yield from iter_tones(sentence, only=missing, usage=usage)
+
+# ---------- Async versions (used by the Gradio handler) ----------
+async def agenerate_tone(sentence, tone):
+  return tone, await llm.ainvoke(prompt.format(sentence=sentence, tone=tone))
+
+async def aiter_tones(sentence, only=None):
+  """Async iter_tones: the model's limit (TONE_PARALLELISM calls at once) bounds the fan-out."""
+  tasks = [asyncio.create_task(agenerate_tone(sentence, tone)) for tone in (only or tones)]
+  try:
+    for next_done in asyncio.as_completed(tasks):
+      yield await next_done
+  finally:
+    for task in tasks:
+      task.cancel()
+
+async def aiter_tones_structured(sentence):
+  formatted_prompt = structured_prompt.format(sentence=sentence, tones=", ".join(tones))
+  results = parse_structured_tones(await json_llm.ainvoke(formatted_prompt))
+  for item in results.items():
+    yield item
+  missing = [tone for tone in tones if tone not in results]
+  if missing:
+    async for item in aiter_tones(sentence, only=missing):
+      yield item
 
-def gradio_interface(sentence):
-    outputs = generate_tones(sentence)
-    return [outputs[t] for t in outputs]
+async def gradio_interface(sentence, mode=MODES[0]):
+    # Async generator: every textbox is filled as soon as its tone is done,
+    # without holding a worker thread while the model generates
+    outputs = {tone: "⏳ generating..." for tone in tones}
+    yield [outputs[t] for t in tones]
+    results = aiter_tones_structured(sentence) if mode == MODES[1] else aiter_tones(sentence)
+    try:
+      async for tone, text in results:
+        outputs[tone] = text
+        yield [outputs[t] for t in tones]
+    except Overloaded as e:
+      raise gr.Error(str(e))
+    llm.log_stats()
 
 demo = gr.Interface(
     fn=gradio_interface,
-    inputs=gr.Textbox(label="Enter a sentence"),
+    inputs=[
+        gr.Textbox(label="Enter a sentence"),
+        gr.Radio(MODES, value=MODES[0], label="Generation mode"),
+    ],
     outputs=[gr.Textbox(label=t.capitalize()) for t in tones],
     title="🧠 Smart Prompting Assistant",
     description="Type a sentence to see how it sounds in different tones."
 )
 
 if __name__ == "__main__":
-    demo.launch()
\ No newline at end of file
+    demo.queue(**gradio_queue_settings()).launch()
\ No newline at end of file
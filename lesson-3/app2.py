@@ -1,47 +1,60 @@
-import os
 import gradio as gr
 from langchain_ollama import OllamaLLM
-from langchain_core.prompts import PromptTemplate
 
-# Function to load all prompt templates dynamically
-def load_prompts(folder="multiple_prompts"):
-    prompts = {}
-    for file in os.listdir(folder):
-        if file.endswith(".txt"):
-            path = os.path.join(folder, file)
-            with open(path, "r") as f:
-                prompts[file.replace(".txt", "").replace("_", " ").title()] = f.read()
-    return prompts
+from llm_cache import CachedLLM
+from model_limits import Overloaded, gradio_queue_settings
+from prompt_registry import PromptRegistry
 
-# Load all prompt templates
-prompts = load_prompts()
+# Load all prompt templates once (parsed and compiled) and reload edited files in the background
+registry = PromptRegistry("multiple_prompts")
 
-# Initialize Ollama model
-llm = OllamaLLM(model="qwen3:4b")
+# Initialize Ollama model (behind the shared response cache)
+llm = CachedLLM(OllamaLLM(model="qwen3:4b"))
+
+# Compiled template of the selected task (it may have been deleted since the page loaded)
+def task_prompt(task, text):
+    try:
+        prompt = registry.get(task)
+    except KeyError:
+        raise gr.Error(f"Task {task!r} no longer exists, pick another one")
+    # Lookup + substitution of its single input variable
+    return prompt.format_text(text)
 
 # Function to apply selected prompt
 def run_prompt(task, text):
-    template = prompts[task]
-    # Identify input variable name dynamically
-    if "{sentence}" in template:
-        input_var = "sentence"
-    else:
-        input_var = "text"
+    answer = llm.invoke(task_prompt(task, text))
+    llm.log_stats()
+    return answer
+
+# Async handler: waits on the model without blocking a worker thread
+async def arun_prompt(task, text):
+    try:
+        answer = await llm.ainvoke(task_prompt(task, text))
+    except Overloaded as e:
+        raise gr.Error(str(e))
+    llm.log_stats()
+    return answer
 
-    prompt = PromptTemplate(input_variables=[input_var], template=template)
-    return llm.invoke(prompt.format(**{input_var: text}))
+# Current task names for the dropdown (prompts are added and deleted while the app runs)
+def refresh_tasks():
+    return gr.update(choices=registry.names())
 
 # Gradio UI
+task_dropdown = gr.Dropdown(registry.names(), label="Choose a Task")
 demo = gr.Interface(
-    fn=run_prompt,
+    fn=arun_prompt,
     inputs=[
-        gr.Dropdown(list(prompts.keys()), label="Choose a Task"),
+        task_dropdown,
         gr.Textbox(label="Enter your text or sentence"),
     ],
     outputs="text",
     title="🧠 Smart Prompt Assistant",
     description="Experiment with tone rewriting, summarization, translation, sentiment analysis, and grammar correction — powered by Ollama & LangChain."
 )
+with demo:
+    # Re-read the task list when the page loads and whenever the dropdown is opened
+    demo.load(refresh_tasks, None, task_dropdown)
+    task_dropdown.focus(refresh_tasks, None, task_dropdown)
 
 if __name__ == "__main__":
-    demo.launch()
+    demo.queue(**gradio_queue_settings()).launch()
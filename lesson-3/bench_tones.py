@@ -0,0 +1,74 @@
+"""
+Latency and token comparison for app1.py tone generation:
+serial loop, concurrent fan-out, and one structured call.
+
+Run from the lesson-3 folder (app1 loads prompts/ with a relative path):
+    TONE_PARALLELISM=5 python bench_tones.py --runs 3
+"""
+import argparse
+import statistics
+import time
+
+import app1
+
+# Benchmark the model itself, not the response cache in front of it
+app1.llm = app1.llm.llm
+app1.json_llm = app1.json_llm.llm
+
+def time_serial(sentence):
+    usage = []
+    start = time.perf_counter()
+    for tone in app1.tones:
+        app1.generate_tone(sentence, tone, usage)
+    return time.perf_counter() - start, None, sum(usage), len(app1.tones)
+
+def time_iter(results):
+    """Consume a (tone, text) generator; returns (total, first result, tokens, tones yielded)."""
+    usage = []
+    start = time.perf_counter()
+    first, count = None, 0
+    for _ in results(usage):
+        count += 1
+        if first is None:
+            first = time.perf_counter() - start
+    return time.perf_counter() - start, first, sum(usage), count
+
+def report(name, runs):
+    total = statistics.mean(r[0] for r in runs)
+    firsts = [r[1] for r in runs if r[1] is not None]
+    first = f"first tone {statistics.mean(firsts):6.2f}s" if firsts else "first tone at the end"
+    print(f"{name:<12} total {total:6.2f}s | {first} | tokens {statistics.mean(r[2] for r in runs):7.0f}")
+    return total
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare tone generation modes")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--sentence", default="Let's finish the project quickly and impress our manager!")
+    args = parser.parse_args()
+    sentence = args.sentence
+
+    # Warm-up so the model is loaded before timing
+    app1.generate_tone(sentence, app1.tones[0])
+
+    serial = [time_serial(sentence) for _ in range(args.runs)]
+    concurrent = [time_iter(lambda usage: app1.iter_tones(sentence, usage=usage))
+                  for _ in range(args.runs)]
+    structured_fallbacks = []
+
+    def structured(usage):
+        fallbacks = []
+        yield from app1.iter_tones_structured(sentence, usage=usage, fallbacks=fallbacks)
+        structured_fallbacks.append(len(fallbacks))
+
+    single = [time_iter(structured) for _ in range(args.runs)]
+
+    print(f"{len(app1.tones)} tones, {args.runs} runs, parallelism {app1.TONE_PARALLELISM}")
+    serial_total = report("serial", serial)
+    concurrent_total = report("concurrent", concurrent)
+    single_total = report("structured", single)
+    print(f"speed-up vs serial: concurrent {serial_total / concurrent_total:5.2f}x | "
+          f"structured {serial_total / single_total:5.2f}x")
+    print(f"structured fallback tones per run: {statistics.mean(structured_fallbacks):.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""
+Response cache + single-flight request coalescing in front of `llm.invoke`.
+
+- Identical prompts submitted at the same moment (several users pressing
+  Submit with the same task and text) share ONE in-flight model call; the
+  others just wait for its result.
+- Finished answers are stored in a small SQLite file with a TTL and a size cap
+  (least recently used entries are evicted first).
+- `stats()` / `stats_text()` expose hit rate, coalesced and rejected requests
+  and the generation time saved. They read in-memory counters only, so they are
+  cheap on the event loop; `log_stats()` prints them at most every
+  LLM_STATS_INTERVAL seconds.
+
+Usage:
+    llm = CachedLLM(ChatOllama(model="qwen3:4b"))
+    text = llm.invoke(prompt)      # always returns the reply text (str)
+    text = await llm.ainvoke(prompt)   # async, limited per model (model_limits.py)
+    llm.log_stats()                # after each request; prints every LLM_STATS_INTERVAL s
+
+Set LLM_CACHE=0 to switch the disk cache off (coalescing still applies).
+
+Standalone copy: lesson-3/llm_cache.py and lesson-4/llm_cache.py are
+identical because each lesson runs from its own folder. Fix both together.
+"""
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+from model_limits import Overloaded, limiter_for
+
+CACHE_PATH = os.getenv("LLM_CACHE_PATH", "llm_cache.sqlite3")
+CACHE_ENABLED = os.getenv("LLM_CACHE", "1") != "0"
+CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(24 * 3600)))
+CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2000"))
+STATS_INTERVAL = float(os.getenv("LLM_STATS_INTERVAL", "30"))
+
+
+def response_text(response):
+    """Chat models return a message, plain LLMs a string: always give back the text."""
+    return getattr(response, "content", response)
+
+
+def model_key(llm):
+    """Identify the model settings that change the answer (part of the cache key)."""
+    settings = [type(llm).__name__]
+    for attr in ("model", "format", "temperature", "num_predict", "reasoning"):
+        settings.append(f"{attr}={getattr(llm, attr, None)}")
+    return "|".join(settings)
+
+
+class CachedLLM:
+    """Wraps a LangChain model: disk cache with TTL + coalescing of identical calls."""
+
+    def __init__(self, llm, path=CACHE_PATH, ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES, enabled=CACHE_ENABLED):
+        self.llm = llm
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._model_key = model_key(llm)
+        self._lock = threading.Lock()
+        self._inflight = {}         # key -> Future shared by identical concurrent calls
+        self._ainflight = {}        # key -> asyncio.Task running the model call for async callers
+        self.limiter = limiter_for(llm)
+        # misses = model calls actually made; rejected = requests turned away with Overloaded
+        self._stats = {"requests": 0, "hits": 0, "misses": 0, "coalesced": 0, "rejected": 0, "saved_seconds": 0.0}
+        self._entries = 0           # rows in the disk cache, kept in step with every write
+        self._logged = None         # time.monotonic() of the last log_stats() line
+        self._db = None
+        if enabled:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    text TEXT NOT NULL,
+                    seconds REAL NOT NULL,
+                    created REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            self._db.commit()
+            self._entries = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def key(self, prompt):
+        return hashlib.sha256(f"{self._model_key}\0{prompt}".encode("utf-8")).hexdigest()
+
+    # ---------- public API ----------
+    def invoke(self, prompt):
+        """Return the reply text for `prompt` (from cache, a shared call, or the model)."""
+        key = self.key(str(prompt))
+        with self._lock:
+            self._stats["requests"] += 1
+            cached = self._lookup(key)
+            if cached is not None:
+                text, seconds = cached
+                self._stats["hits"] += 1
+                self._stats["saved_seconds"] += seconds
+                return text
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+                self._stats["misses"] += 1
+            else:
+                self._stats["coalesced"] += 1
+
+        if not leader:
+            text, seconds = future.result()
+            with self._lock:
+                self._stats["saved_seconds"] += seconds
+            return text
+
+        start = time.perf_counter()
+        try:
+            text = response_text(self.llm.invoke(prompt))
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+        seconds = time.perf_counter() - start
+        with self._lock:
+            self._store(key, text, seconds)
+            del self._inflight[key]
+        future.set_result((text, seconds))
+        return text
+
+    async def ainvoke(self, prompt):
+        """Async `invoke`: awaits the model's async client inside its concurrency limit.
+
+        The model call runs as its own task that every identical caller awaits,
+        so cancelling one caller (a closed browser tab) never cancels the others;
+        the answer is still cached when all of them are gone. SQLite work runs in
+        a worker thread, off the event loop.
+        Raises model_limits.Overloaded when the model's waiting line is full.
+        """
+        key = self.key(str(prompt))
+        with self._lock:
+            self._stats["requests"] += 1
+        task = self._ainflight.get(key)
+        if task is None:
+            cached = await asyncio.to_thread(self._cached, key)
+            if cached is not None:
+                text, seconds = cached
+                with self._lock:
+                    self._stats["hits"] += 1
+                    self._stats["saved_seconds"] += seconds
+                return text
+            task = self._ainflight.get(key)  # started while we were reading the cache?
+
+        leader = task is None
+        if leader:
+            task = self._ainflight[key] = asyncio.create_task(self._acall(key, prompt))
+            task.add_done_callback(lambda done: done.cancelled() or done.exception())  # no "never retrieved"
+        else:
+            with self._lock:
+                self._stats["coalesced"] += 1
+        try:
+            text, seconds = await asyncio.shield(task)
+        except Overloaded:
+            with self._lock:
+                self._stats["rejected"] += 1
+            raise
+        if not leader:
+            with self._lock:
+                self._stats["saved_seconds"] += seconds
+        return text
+
+    async def _acall(self, key, prompt):
+        """The one model call behind every identical `ainvoke` -> (text, seconds)."""
+        try:
+            start = time.perf_counter()
+            async with self.limiter.slot():
+                with self._lock:
+                    self._stats["misses"] += 1
+                text = response_text(await self.llm.ainvoke(prompt))
+            seconds = time.perf_counter() - start
+            await asyncio.to_thread(self._stored, key, text, seconds)
+            return text, seconds
+        finally:
+            del self._ainflight[key]
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = self._entries
+        stats["hit_rate"] = stats["hits"] / stats["requests"] if stats["requests"] else 0.0
+        stats["running"] = self.limiter.running
+        stats["waiting"] = self.limiter.waiting
+        return stats
+
+    def stats_text(self):
+        s = self.stats()
+        return (f"LLM cache: {s['requests']} requests | hit rate {s['hit_rate']:.0%} | "
+                f"coalesced {s['coalesced']} | model calls {s['misses']} | "
+                f"saved {s['saved_seconds']:.1f}s | {s['entries']} cached | "
+                f"running {s['running']} waiting {s['waiting']} rejected {s['rejected']}")
+
+    def log_stats(self, interval=STATS_INTERVAL):
+        """Print `stats_text()` if the last line is older than `interval` seconds."""
+        now = time.monotonic()
+        with self._lock:
+            if self._logged is not None and now - self._logged < interval:
+                return
+            self._logged = now
+        print(self.stats_text())
+
+    def clear(self):
+        with self._lock:
+            if self._db:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+                self._entries = 0
+
+    def _cached(self, key):
+        with self._lock:
+            return self._lookup(key)
+
+    def _stored(self, key, text, seconds):
+        with self._lock:
+            self._store(key, text, seconds)
+
+    # ---------- disk cache (called with self._lock held) ----------
+    def _lookup(self, key):
+        if not self._db:
+            return None
+        row = self._db.execute("SELECT text, seconds, created FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if now - row[2] > self.ttl:
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._db.commit()
+            self._entries -= 1
+            return None
+        self._db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+        self._db.commit()
+        return row[0], row[1]
+
+    def _store(self, key, text, seconds):
+        if not self._db:
+            return
+        now = time.time()
+        self._db.execute(
+            "INSERT OR REPLACE INTO responses (key, text, seconds, created, last_used) VALUES (?, ?, ?, ?, ?)",
+            (key, text, seconds, now, now),
+        )
+        # Expired entries first, then the least recently used ones above the size cap
+        self._db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+        self._entries = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        overflow = self._entries - self.max_entries
+        if overflow > 0:
+            self._db.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_used LIMIT ?)",
+                (overflow,),
+            )
+            self._entries = self.max_entries
+        self._db.commit()
@@ -0,0 +1,91 @@
+"""
+Local load test for the async prompt app (app2.arun_prompt).
+
+Simulates N concurrent users, each sending requests back to back, for a
+series of increasing N, and reports throughput, tail latency and how many
+requests were turned away by backpressure (model_limits.Overloaded).
+
+Run from the lesson-3 folder:
+    python load_test.py                          # real Ollama model
+    python load_test.py --stub-latency 0.5       # fake 0.5 s model, tests the serving layer only
+    python load_test.py --users 1 4 16 64 --requests 5 --same-text
+
+Tip: run with LLM_CACHE=0 unless you want to measure cache hits, and use
+--same-text to see request coalescing at work.
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+import app2
+
+
+class StubModel:
+    """Stands in for the Ollama model: sleeps, then echoes the prompt length."""
+
+    def __init__(self, latency):
+        self.model = app2.llm.llm.model
+        self.latency = latency
+
+    async def ainvoke(self, prompt):
+        await asyncio.sleep(self.latency)
+        return f"stub reply ({len(prompt)} chars)"
+
+    def invoke(self, prompt):
+        time.sleep(self.latency)
+        return f"stub reply ({len(prompt)} chars)"
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+async def user(task, requests, same_text, latencies, errors):
+    for _ in range(requests):
+        text = "The quick brown fox jumps over the lazy dog." if same_text else f"Sentence number {uuid.uuid4()}"
+        start = time.perf_counter()
+        try:
+            await app2.arun_prompt(task, text)
+            latencies.append(time.perf_counter() - start)
+        except Exception as e:
+            errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+
+
+async def run_level(task, users, requests, same_text):
+    latencies, errors = [], {}
+    start = time.perf_counter()
+    await asyncio.gather(*(user(task, requests, same_text, latencies, errors) for _ in range(users)))
+    elapsed = time.perf_counter() - start
+    print(f"{users:>5} users | {len(latencies):>5} ok | {sum(errors.values()):>4} rejected | "
+          f"{len(latencies) / elapsed:7.2f} req/s | p50 {percentile(latencies, 50):6.2f}s | "
+          f"p95 {percentile(latencies, 95):6.2f}s | p99 {percentile(latencies, 99):6.2f}s"
+          + (f" | {errors}" if errors else ""))
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--requests", type=int, default=3, help="requests per user")
+    parser.add_argument("--task", default="Grammar Fix Prompt")
+    parser.add_argument("--same-text", action="store_true", help="every user sends the same text")
+    parser.add_argument("--stub-latency", type=float, help="replace the model with a fake one (seconds per call)")
+    args = parser.parse_args()
+
+    if args.stub_latency is not None:
+        app2.llm.llm = StubModel(args.stub_latency)
+    limiter = app2.llm.limiter
+    print(f"Task '{args.task}' | model {limiter.name} | max concurrency {limiter.max_concurrency} | "
+          f"max waiting {limiter.max_waiting}\n")
+    # All levels run on one event loop (the limiter's semaphore belongs to it)
+    for users in args.users:
+        await run_level(args.task, users, args.requests, args.same_text)
+    print("\n" + app2.llm.stats_text())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,125 @@
+"""
+Prompt registry for the Gradio prompt apps.
+
+Each template file is parsed ONCE: its input variables are found and it is
+split into literal text and placeholders. Formatting a request is then a
+dictionary lookup plus string joining, instead of building a new
+PromptTemplate and guessing the variable name every time.
+
+A background thread polls the folder and reloads only the files whose
+modification time or size changed, so prompts can be edited, added or deleted
+while the app is running.
+
+Usage:
+    registry = PromptRegistry("multiple_prompts")
+    text = registry.get("Translate Prompt").format_text("Good morning")
+"""
+import os
+import string
+import threading
+
+_formatter = string.Formatter()
+
+
+def prompt_name(filename):
+    """'translate_prompt.txt' -> 'Translate Prompt' (the label shown in the UI)."""
+    return filename.replace(".txt", "").replace("_", " ").title()
+
+
+class CompiledPrompt:
+    """A template split into (literal, variable) parts, ready for fast formatting."""
+
+    def __init__(self, name, template, path=None, stamp=None):
+        self.name = name
+        self.template = template
+        self.path = path
+        self.stamp = stamp
+        self.parts = []
+        variables = []
+        for literal, field, spec, conversion in _formatter.parse(template):
+            if spec or conversion:
+                raise ValueError(f"{name}: format specs are not supported in prompt templates ({{{field}}})")
+            self.parts.append((literal, field))
+            if field is not None and field not in variables:
+                variables.append(field)
+        self.variables = tuple(variables)
+
+    def format(self, **values):
+        """Fill in the template; raises KeyError for a missing variable."""
+        return "".join(literal + (values[field] if field is not None else "") for literal, field in self.parts)
+
+    def format_text(self, text):
+        """Fill the template's single input variable (e.g. {text} or {sentence})."""
+        if len(self.variables) != 1:
+            raise ValueError(f"{self.name} expects {self.variables}, not a single text input")
+        return self.format(**{self.variables[0]: text})
+
+
+class PromptRegistry:
+    """All *.txt templates of a folder, compiled once and hot-reloaded on change."""
+
+    def __init__(self, folder, watch=True, poll_interval=1.0):
+        self.folder = folder
+        self.poll_interval = poll_interval
+        self._prompts = {}          # name -> CompiledPrompt (replaced, never mutated)
+        self._failed = {}           # name -> stamp of a file that did not parse
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.reload()
+        self._thread = None
+        if watch:
+            self._thread = threading.Thread(target=self._watch, name="prompt-registry", daemon=True)
+            self._thread.start()
+
+    def names(self):
+        return sorted(self._prompts)
+
+    def get(self, name):
+        return self._prompts[name]
+
+    def format(self, name, **values):
+        return self._prompts[name].format(**values)
+
+    def reload(self):
+        """Re-read only new or changed files and drop deleted ones. Returns changed names."""
+        with self._lock:
+            current = dict(self._prompts)
+            seen, changed = set(), []
+            for entry in os.scandir(self.folder):
+                if not entry.name.endswith(".txt") or not entry.is_file():
+                    continue
+                name = prompt_name(entry.name)
+                info = entry.stat()
+                stamp = (info.st_mtime_ns, info.st_size)
+                seen.add(name)
+                if name in current and current[name].stamp == stamp or self._failed.get(name) == stamp:
+                    continue
+                try:
+                    with open(entry.path, "r") as f:
+                        current[name] = CompiledPrompt(name, f.read(), entry.path, stamp)
+                    self._failed.pop(name, None)
+                    changed.append(name)
+                except (OSError, ValueError) as e:
+                    self._failed[name] = stamp
+                    print(f"⚠️ Could not load prompt {entry.name}: {e}")
+            for name in set(current) - seen:
+                del current[name]
+                changed.append(name)
+            # Swap in the new dict in one step so readers never see a half-updated registry
+            self._prompts = current
+            return changed
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                changed = self.reload()
+            except OSError as e:
+                print(f"⚠️ Prompt folder not readable: {e}")
+                continue
+            if changed:
+                print(f"🔄 Reloaded prompts: {', '.join(sorted(changed))}")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
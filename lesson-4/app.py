@@ -11,62 +11,15 @@ from langchain_ollama import ChatOllama
 from langchain_core.prompts import PromptTemplate
 ## Support for regular expressions (RE). ##
 import re
-## The `ast` module helps Python applications to process trees of the Python abstract syntax grammar. ##
-import ast
-## Operator Interface ## 
-import operator
+import time
 
 # ---------- Safe arithmetic evaluator ----------
 # Accepts arithmetic expressions and evaluates them with AST for safety.
 # Supports: + - * / // % ** parentheses, unary +/-
-ALLOWED_OPERATORS = {
-    ast.Add: operator.add,
-    ast.Sub: operator.sub,
-    ast.Mult: operator.mul,
-    ast.Div: operator.truediv,
-    ast.FloorDiv: operator.floordiv,
-    ast.Mod: operator.mod,
-    ast.Pow: operator.pow,
-    ast.UAdd: lambda x: x,
-    ast.USub: operator.neg,
-}
-
-def safe_eval(expr: str):
-    """
-    Safely evaluate arithmetic expression expr.
-    Raises ValueError if expression contains disallowed nodes.
-    """
-    # normalize: remove commas in numbers like "1,234" -> "1234" (optional)
-    expr = expr.replace(",", "")
-    node = ast.parse(expr, mode='eval')
-
-    def _eval(node):
-        if isinstance(node, ast.Expression):
-            return _eval(node.body)
-        if isinstance(node, ast.Constant):  # Python 3.8+: numbers appear as Constant
-            if isinstance(node.value, (int, float)):
-                return node.value
-            raise ValueError("Only numeric constants allowed")
-        if isinstance(node, ast.Num):  # older AST node
-            return node.n
-        if isinstance(node, ast.BinOp):
-            op_type = type(node.op)
-            if op_type not in ALLOWED_OPERATORS:
-                raise ValueError(f"Disallowed operator: {op_type}")
-            left = _eval(node.left)
-            right = _eval(node.right)
-            return ALLOWED_OPERATORS[op_type](left, right)
-        if isinstance(node, ast.UnaryOp):
-            op_type = type(node.op)
-            if op_type not in ALLOWED_OPERATORS:
-                raise ValueError(f"Disallowed unary operator: {op_type}")
-            operand = _eval(node.operand)
-            return ALLOWED_OPERATORS[op_type](operand)
-        if isinstance(node, ast.Call):
-            raise ValueError("Function calls are not allowed")
-        raise ValueError(f"Unsupported expression: {type(node).__name__}")
-
-    return _eval(node)
+# Compiled once per expression and cached (see calc_engine.py).
+from calc_engine import safe_eval
+# Plain arithmetic is solved step by step locally; the model is the fallback.
+from step_tracer import try_trace
 
 # ---------- LLM + prompt ----------
 # Use your local Ollama chat model (change model name if needed)
@@ -79,7 +32,7 @@ When asked to show steps, do the following:
 1) Provide a clear numbered step-by-step explanation of how to compute the expression.
 2) At the end, clearly write: Final Answer: <number>
 
-If asked NOT to show steps, only output the final numeric answer (no extra text).
+If asked NOT to show steps, only output: Final Answer: <number> (no extra text).
 
 Do not include chain-of-thought or internal reasoning beyond numbered steps.
 Keep steps short and precise.
@@ -90,16 +43,20 @@ Mode: "{mode}"   # mode is either "show_steps" or "final_only"
 
 prompt = PromptTemplate(input_variables=["expression", "mode"], template=step_template_text)
 
-def ask_model(expression: str, show_steps: bool = True) -> str:
+def ask_model(expression: str, show_steps: bool = True, usage=None) -> str:
     """
     Format prompt and call the model; returns raw model text.
+    Appends the generated token count to `usage` if given.
     """
     mode = "show_steps" if show_steps else "final_only"
     formatted = prompt.format(expression=expression, mode=mode)
     # For ChatOllama, use invoke to get text
     resp = llm.invoke(formatted)
-    # Some wrappers return strings directly; ensure string
-    return str(resp).strip()
+    metadata = getattr(resp, "usage_metadata", None)
+    if usage is not None and metadata:
+        usage.append(metadata["output_tokens"])
+    # Chat models return a message, some wrappers a plain string
+    return str(getattr(resp, "content", resp)).strip()
 
 # ---------- Helpers to extract numeric answer from model output ----------
 def extract_final_numeric(text: str):
@@ -120,37 +77,162 @@ def extract_final_numeric(text: str):
         return float(last) if '.' in last else int(last)
     return None
 
+# ---------- Early stop for final_only ----------
+# In final_only mode the answer is all we need, so the stream is closed as soon
+# as "Final Answer: <number>" is complete (closing the HTTP stream makes Ollama
+# stop generating). A number counts as complete once a character follows it
+# that cannot continue it; a number at the very end of the text so far is
+# confirmed by the next chunk (or the end of the stream).
+EARLY_STOP = True
+FINAL_ANSWER_RE = re.compile(r"Final Answer\s*[:\-]\s*([+-]?\d+(?:\.\d+)?)(?=[^\d.]|\.\D|$)", re.IGNORECASE)
+
+early_stop_log = []      # one dict per final_only model call
+
+
+def _number(s):
+    return float(s) if '.' in s else int(s)
+
+
+class FinalAnswerWatcher:
+    """Feed streamed text; `feed` returns the number once 'Final Answer: <n>' is complete."""
+
+    TAIL = 80                # characters kept from earlier chunks: a match never starts further back
+
+    def __init__(self):
+        self._parts = []
+        self._tail = ""          # end of the text that the next match can still start in
+        self._in_think = False
+        self._think_done = False
+        self.tokens = 0          # streamed chunks, ~1 token each
+        self.answer = None
+        self.pending = None      # number at the very end of the text, not confirmed yet
+
+    @property
+    def text(self):
+        return "".join(self._parts)
+
+    def feed(self, chunk: str):
+        self.tokens += 1
+        self._parts.append(chunk)
+        if self.answer is not None:
+            return self.answer
+        # Only the new chunk plus a short tail is ever scanned, so a feed costs O(chunk)
+        self._tail = self._tail[-self.TAIL:] + chunk
+        if not self._skip_think():
+            return None
+        m = FINAL_ANSWER_RE.search(self._tail)
+        self.pending = None
+        if m and m.end() == len(self._tail):
+            self.pending = _number(m.group(1))  # "Final Answer: 4" may still become "42"
+        elif m:
+            self.answer = _number(m.group(1))
+        return self.answer
+
+    def _skip_think(self):
+        """Track a <think>...</think> block: a 'Final Answer' inside it does not count."""
+        if self._think_done:
+            return True
+        if not self._in_think:
+            start = self._tail.find("<think>")
+            if start == -1:
+                return True
+            self._in_think = True
+            self._tail = self._tail[start + len("<think>"):]
+        end = self._tail.find("</think>")
+        if end == -1:
+            return False
+        self._in_think, self._think_done = False, True
+        self._tail = self._tail[end + len("</think>"):]
+        return True
+
+
+def ask_model_final_only(expression: str):
+    """
+    Stream a final_only answer and stop once the number is parsed.
+    Returns (text, info) where info has the parsed answer, tokens generated and
+    whether the stream was stopped early. The tokens this saves are not known
+    per request; bench_calc.py measures them against full-length runs.
+    """
+    formatted = prompt.format(expression=expression, mode="final_only")
+    watcher = FinalAnswerWatcher()
+    stream = llm.stream(formatted)
+    stopped = False
+    try:
+        for chunk in stream:
+            if watcher.feed(chunk.content) is not None:
+                stopped = True
+                break
+    finally:
+        stream.close()
+
+    # A number that ended the reply is only confirmed by the end of the stream
+    answer = watcher.answer if watcher.answer is not None else watcher.pending
+    info = {"stopped_early": stopped, "tokens": watcher.tokens, "answer": answer}
+    early_stop_log.append(info)
+    return watcher.text.strip(), info
+
+
 # ---------- Main interactive function ----------
-def solve_expression_interactive(expression: str, show_steps: bool = True):
+def solve_expression_interactive(expression: str, show_steps: bool = True, use_model: bool = False):
+    """
+    Solve and verify one expression. The local step tracer answers plain
+    arithmetic; the model is only asked when the tracer cannot read the input
+    (or when use_model=True).
+    """
     print("User expression:", expression)
-    model_text = ask_model(expression, show_steps=show_steps)
-    print("\n--- Model output ---")
+    start = time.perf_counter()
+    trace = None if use_model else try_trace(expression)
+    early_stop = None
+    usage = []
+    if trace is not None:
+        source = "tracer"
+        model_text = trace.text(show_steps)
+    elif not show_steps and EARLY_STOP:
+        source = "model"
+        model_text, early_stop = ask_model_final_only(expression)
+        usage.append(early_stop["tokens"])
+    else:
+        source = "model"
+        model_text = ask_model(expression, show_steps=show_steps, usage=usage)
+    seconds = time.perf_counter() - start
+    print(f"\n--- {'Step tracer' if source == 'tracer' else 'Model'} output ({seconds * 1000:.1f} ms) ---")
     print(model_text)
     print("--------------------\n")
+    if early_stop and early_stop["stopped_early"]:
+        print(f"⏹️ Stopped after {early_stop['tokens']} tokens")
 
-    parsed_answer = extract_final_numeric(model_text)
-    verified = None
-    verification_message = ""
-    try:
-        computed = safe_eval(expression)
-        verified = True if (parsed_answer is not None and abs(float(parsed_answer) - float(computed)) < 1e-9) else False
-        verification_message = f"Computed locally: {computed}"
-    except Exception as e:
-        computed = None
-        verification_message = f"Local evaluation error: {e}"
-        verified = False
-
-    print("Parsed model numeric answer:", parsed_answer)
-    print(verification_message)
-    if computed is not None:
-        if verified:
-            print("✅ Model answer matches local computation.")
+    if trace is not None:
+        # The tracer runs the local evaluator itself: its answer is computed, not verified
+        parsed_answer = computed = trace.result
+        verified = None
+        if trace.error:
+            print(f"⚠️ Cannot compute: {trace.error}")
         else:
-            print("❌ MISMATCH: Model answer does not match local computation.")
-            if parsed_answer is None:
-                print("Note: could not parse numeric answer from model output.")
+            print(f"🧮 Computed locally: {computed}")
+    else:
+        parsed_answer = extract_final_numeric(model_text)
+        verified = None
+        verification_message = ""
+        try:
+            computed = safe_eval(expression)
+            verified = True if (parsed_answer is not None and abs(float(parsed_answer) - float(computed)) < 1e-9) else False
+            verification_message = f"Computed locally: {computed}"
+        except Exception as e:
+            computed = None
+            verification_message = f"Local evaluation error: {e}"
+            verified = False
+
+        print("Parsed model numeric answer:", parsed_answer)
+        print(verification_message)
+        if computed is not None:
+            if verified:
+                print("✅ Model answer matches local computation.")
             else:
-                print(f"Model parsed: {parsed_answer} vs computed: {computed}")
+                print("❌ MISMATCH: Model answer does not match local computation.")
+                if parsed_answer is None:
+                    print("Note: could not parse numeric answer from model output.")
+                else:
+                    print(f"Model parsed: {parsed_answer} vs computed: {computed}")
 
     return {
         "expression": expression,
@@ -158,6 +240,10 @@ def solve_expression_interactive(expression: str, show_steps: bool = True):
         "parsed_answer": parsed_answer,
         "computed": computed,
         "verified": verified,
+        "source": source,
+        "seconds": seconds,
+        "tokens": sum(usage) if usage else (0 if source == "tracer" else None),
+        "early_stop": early_stop,
     }
 
 # ---------- Example usage ----------
@@ -167,3 +253,9 @@ if __name__ == "__main__":
 
     # Try final only
     solve_expression_interactive("2.5 * (4 + 6) - 3", show_steps=False)
+
+    # Ask the model anyway (e.g. to compare its explanation with the tracer)
+    solve_expression_interactive("12 * (3 + 4)", show_steps=True, use_model=True)
+
+    # Model in final_only mode: the stream stops at "Final Answer: <number>"
+    solve_expression_interactive("2.5 * (4 + 6) - 3", show_steps=False, use_model=True)
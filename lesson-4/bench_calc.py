@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+bench_calc.py
+
+Accuracy and latency benchmark for the step calculator (app.py).
+
+Every expression of a corpus with known answers is run through
+`solve_expression_interactive` in both modes (show_steps and final_only) with
+a bounded number of concurrent requests. The report records, per mode:
+parse success, verification rate, accuracy against the known answer, latency
+and token distributions and early-stop savings. It is written as JSON, so two
+runs can be diffed.
+
+Early-stop savings are measured, not estimated: before the final_only model
+run, the same corpus runs once with app.EARLY_STOP off, and every stopped
+reply is compared with the full-length reply to the same expression.
+
+Corpus: JSONL with {"expression": "...", "answer": 42} per line ("answer" is
+optional and computed locally when missing), or generated:
+
+    python bench_calc.py --count 200 --seed 1 --save-corpus corpus.jsonl
+    python bench_calc.py --corpus corpus.jsonl --workers 4 --output report.json
+    python bench_calc.py --stub --stub-error-rate 0.1     # no Ollama needed
+    python bench_calc.py --path tracer                    # local step tracer only
+"""
+import argparse
+import contextlib
+import io
+import json
+import random
+import re
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import app
+from calc_engine import safe_eval
+from step_tracer import trace_expression
+
+MODES = {"show_steps": True, "final_only": False}
+
+
+# ---------- Corpus ----------
+def random_expression(rng, depth=3):
+    """A random arithmetic expression with small operands."""
+    if depth == 0 or rng.random() < 0.25:
+        return str(rng.randint(1, 20))
+    op = rng.choice(["+", "-", "*", "/", "//", "%", "**"])
+    left = random_expression(rng, depth - 1)
+    right = str(rng.randint(0, 3)) if op == "**" else random_expression(rng, depth - 1)
+    return f"({left} {op} {right})"
+
+
+def generate_corpus(count, seed=0, depth=3):
+    """`count` expressions with their answers (division by zero etc. are skipped)."""
+    rng = random.Random(seed)
+    corpus = []
+    while len(corpus) < count:
+        expression = random_expression(rng, depth)
+        if expression.startswith("("):
+            expression = expression[1:-1]
+        try:
+            corpus.append({"expression": expression, "answer": safe_eval(expression)})
+        except (ArithmeticError, ValueError):
+            continue
+    return corpus
+
+
+def load_corpus(path):
+    corpus = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                item = json.loads(line)
+                if item.get("answer") is None:
+                    item["answer"] = safe_eval(item["expression"])
+                corpus.append(item)
+    return corpus
+
+
+# ---------- Stub model ----------
+class StubModel:
+    """
+    Stands in for the Ollama chat model: answers with the step tracer's text,
+    sleeps `token_latency` per token, and gets `error_rate` of the answers wrong.
+    """
+
+    def __init__(self, token_latency=0.005, error_rate=0.0, seed=0):
+        self.token_latency = token_latency
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+
+    def _reply(self, prompt):
+        expression = re.search(r'Expression: "(.*)"', prompt).group(1)
+        show_steps = 'Mode: "show_steps"' in prompt
+        trace = trace_expression(expression)
+        if self._rng.random() < self.error_rate:
+            trace.result += 1
+        text = trace.text(show_steps) + "\nLet me know if you need anything else!"
+        return re.findall(r"\S+\s*", text)
+
+    def invoke(self, prompt):
+        tokens = self._reply(prompt)
+        time.sleep(self.token_latency * len(tokens))
+        return SimpleNamespace(content="".join(tokens), usage_metadata={"output_tokens": len(tokens)})
+
+    def stream(self, prompt):
+        for token in self._reply(prompt):
+            time.sleep(self.token_latency)
+            yield SimpleNamespace(content=token)
+
+
+# ---------- Benchmark ----------
+def percentiles(values):
+    if not values:
+        return None
+    ordered = sorted(values)
+    pick = lambda pct: ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))]
+    return {"mean": statistics.mean(ordered), "p50": pick(50), "p90": pick(90), "p99": pick(99), "max": ordered[-1]}
+
+
+def run_one(item, show_steps, use_model):
+    start = time.perf_counter()
+    record = {"expression": item["expression"], "answer": item["answer"]}
+    try:
+        result = app.solve_expression_interactive(item["expression"], show_steps=show_steps, use_model=use_model)
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+        record["latency"] = time.perf_counter() - start
+        return record
+    parsed = result["parsed_answer"]
+    record.update({
+        "latency": time.perf_counter() - start,
+        "source": result["source"],
+        "parsed": parsed,
+        "verified": result["verified"],  # None: tracer answers are computed, not verified
+        "correct": parsed is not None and abs(float(parsed) - float(item["answer"])) < 1e-9,
+        "tokens": result["tokens"],
+        "early_stop": result["early_stop"],
+    })
+    return record
+
+
+def full_lengths(corpus, workers):
+    """Tokens of each final_only reply when it runs to the end (early stop off)."""
+    early_stop, app.EARLY_STOP = app.EARLY_STOP, False
+    try:
+        records, _ = run_mode(corpus, False, True, workers)
+    finally:
+        app.EARLY_STOP = early_stop
+    return {r["expression"]: r["tokens"] for r in records if r.get("tokens") is not None}
+
+
+def tokens_saved(records, baseline):
+    if not baseline:
+        return None
+    return sum(max(0, baseline[r["expression"]] - r["tokens"]) for r in records
+               if r["early_stop"] and r["early_stop"]["stopped_early"] and r["expression"] in baseline)
+
+
+def summarize(records, elapsed, baseline=None):
+    ok = [r for r in records if "error" not in r]
+    tokens = [r["tokens"] for r in ok if r["tokens"] is not None]
+    stops = [r["early_stop"] for r in ok if r["early_stop"]]
+    count = len(records) or 1
+    checked = [r for r in ok if r["verified"] is not None]
+    return {
+        "requests": len(records),
+        "errors": len(records) - len(ok),
+        "parse_success": sum(r["parsed"] is not None for r in ok) / count,
+        "verification_rate": sum(r["verified"] for r in checked) / len(checked) if checked else None,
+        "accuracy": sum(r["correct"] for r in ok) / count,
+        "throughput_per_s": len(records) / elapsed if elapsed else None,
+        "latency_s": percentiles([r["latency"] for r in ok]),
+        "tokens": percentiles(tokens),
+        "tokens_total": sum(tokens),
+        "early_stops": sum(s["stopped_early"] for s in stops),
+        "tokens_saved": tokens_saved(ok, baseline),
+    }
+
+
+def run_mode(corpus, show_steps, use_model, workers):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        records = list(pool.map(lambda item: run_one(item, show_steps, use_model), corpus))
+    return records, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="JSONL file of expressions (default: generate one)")
+    parser.add_argument("--count", type=int, default=50, help="expressions to generate")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--depth", type=int, default=3, help="nesting depth of generated expressions")
+    parser.add_argument("--save-corpus", help="write the corpus used to this JSONL file")
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    parser.add_argument("--path", choices=["model", "tracer"], default="model",
+                        help="'model' forces the LLM, 'tracer' uses the local fast path")
+    parser.add_argument("--workers", type=int, default=4, help="concurrent requests")
+    parser.add_argument("--stub", action="store_true", help="replace the model with a fake one")
+    parser.add_argument("--stub-token-latency", type=float, default=0.005, help="seconds per fake token")
+    parser.add_argument("--stub-error-rate", type=float, default=0.0, help="share of wrong fake answers")
+    parser.add_argument("--output", default="bench_calc_report.json")
+    parser.add_argument("--details", action="store_true", help="include every request in the report")
+    parser.add_argument("--verbose", action="store_true", help="keep app.py's per-request output")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus) if args.corpus else generate_corpus(args.count, args.seed, args.depth)
+    if args.save_corpus:
+        with open(args.save_corpus, "w", encoding="utf-8") as f:
+            for item in corpus:
+                f.write(json.dumps(item) + "\n")
+    if args.stub:
+        app.llm = StubModel(args.stub_token_latency, args.stub_error_rate, args.seed)
+
+    report = {
+        "config": {
+            "model": "stub" if args.stub else getattr(app.llm, "model", type(app.llm).__name__),
+            "path": args.path,
+            "workers": args.workers,
+            "corpus": args.corpus or f"generated(count={args.count}, seed={args.seed}, depth={args.depth})",
+            "expressions": len(corpus),
+            "early_stop": app.EARLY_STOP,
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "modes": {},
+    }
+    for mode in args.modes:
+        print(f"Running {len(corpus)} expressions in {mode} mode ({args.path}, {args.workers} workers)...",
+              file=sys.stderr, flush=True)
+        # app.py prints every request; hide that unless asked for
+        with contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO()):
+            baseline = None
+            if mode == "final_only" and args.path == "model" and app.EARLY_STOP:
+                baseline = full_lengths(corpus, args.workers)
+            records, elapsed = run_mode(corpus, MODES[mode], args.path == "model", args.workers)
+        summary = summarize(records, elapsed, baseline)
+        report["modes"][mode] = {"summary": summary, **({"results": records} if args.details else {})}
+        latency = summary["latency_s"] or {}
+        rate = summary["verification_rate"]
+        verified = f"verified {rate:.0%}" if rate is not None else "computed locally"
+        saved = f" (saved {summary['tokens_saved']})" if summary["tokens_saved"] is not None else ""
+        print(f"  {mode:<10} parsed {summary['parse_success']:.0%} | {verified} | "
+              f"accuracy {summary['accuracy']:.0%} | p50 {latency.get('p50', 0):.3f}s p90 {latency.get('p90', 0):.3f}s | "
+              f"tokens {summary['tokens_total']}{saved} | errors {summary['errors']}",
+              file=sys.stderr)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+calc_engine.py
+
+Compiled, cached evaluator behind `safe_eval` for the step calculator.
+
+An expression is parsed and validated against the whitelist ONCE, then turned
+into a tree of small Python closures (no isinstance chains at evaluation time).
+Compiled expressions are cached, so verifying the same expression again is a
+dictionary lookup plus a few function calls.
+
+Batch helpers:
+- evaluate_many(["1+2", "3*4", ...])        many expressions, compiled once each
+- evaluate_array("x * (y + 1)", x=..., y=...) one expression over NumPy arrays
+
+Whitelist (same as before): numbers, + - * / // % **, parentheses, unary +/-.
+Variable names are only accepted by evaluate_array / compile_expression when
+they are declared, so `safe_eval` still rejects every name.
+
+Resource budgets (on by default, see `Budget`): inputs like 9**9**9 would pin a
+CPU core and eat memory. Before every ** and * the size of the result is
+estimated from the operands' bit lengths; anything above `max_int_bits` raises
+BudgetExceeded immediately. Float results that overflow to inf (or become
+nan) are rejected the same way. Expression length and a wall-clock deadline
+are capped as well. Pass budget=None for the old unbounded behaviour.
+
+evaluate_array uses ARRAY_BUDGET: no deadline (its run time grows with the
+array size), and integer arrays are checked for int64 overflow, which NumPy
+would otherwise wrap around silently.
+"""
+import ast
+import math
+import operator
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+
+try:  # NumPy is only needed for evaluate_array
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+# ---------- Whitelist ----------
+ALLOWED_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+    ast.UAdd: lambda x: x,
+    ast.USub: operator.neg,
+}
+
+
+# ---------- Budgets ----------
+@dataclass(frozen=True)
+class Budget:
+    """Limits for one evaluation."""
+    max_int_bits: int = 10_000   # ~3,000 decimal digits
+    timeout: float = 0.25        # seconds of evaluation (wall clock)
+    max_chars: int = 2_000       # expression length
+
+
+DEFAULT_BUDGET = Budget()
+ARRAY_BUDGET = Budget(timeout=math.inf)  # one vectorized pass over any number of rows
+
+
+class BudgetExceeded(ValueError):
+    """The expression would exceed its size or time budget."""
+
+
+# Key for the deadline inside the evaluation env (not a valid variable name)
+_DEADLINE = "<deadline>"
+
+
+def _int_bits(value):
+    return value.bit_length() if isinstance(value, int) else 0
+
+
+def _check_pow(base, exp, budget):
+    """Estimate the size of base ** exp before computing it."""
+    if isinstance(base, int) and isinstance(exp, int) and exp > 0 and abs(base) > 1:
+        if exp > budget.max_int_bits or exp * math.log2(abs(base)) > budget.max_int_bits:
+            raise BudgetExceeded(
+                f"Result of {_short(base)} ** {_short(exp)} would exceed {budget.max_int_bits} bits"
+            )
+
+
+def _check_mul(left, right, budget):
+    if _int_bits(left) + _int_bits(right) > budget.max_int_bits:
+        raise BudgetExceeded(f"Product would exceed {budget.max_int_bits} bits")
+
+
+def _check_int_array(op_type, fn, args, result):
+    """NumPy integer arithmetic wraps around on overflow: redo it in float64 and compare."""
+    if op_type in (ast.Add, ast.Sub, ast.Mult, ast.Pow):
+        approx = fn(*(np.asarray(arg, dtype=np.float64) for arg in args))
+        if np.any(np.abs(approx) >= float(np.iinfo(result.dtype).max)):  # within float64 rounding
+            raise BudgetExceeded(f"Result overflows {result.dtype}; pass float arrays for larger values")
+
+
+def _short(value):
+    return str(value) if _int_bits(value) <= 64 else f"<{_int_bits(value)}-bit number>"
+
+
+def _guard(op_type, fn, budget):
+    """Wrap an operator with the deadline and size checks of `budget`."""
+    pre_check = {ast.Pow: _check_pow, ast.Mult: _check_mul}.get(op_type)
+    limit = budget.max_int_bits
+
+    def guarded(env, *args):
+        if time.perf_counter() > env[_DEADLINE]:
+            raise BudgetExceeded(f"Evaluation took longer than {budget.timeout}s")
+        if pre_check is not None:
+            pre_check(*args, budget)
+        try:
+            result = fn(*args)
+        except OverflowError as e:
+            raise BudgetExceeded(f"Result too large: {e}") from e
+        if _int_bits(result) > limit:
+            raise BudgetExceeded(f"Result would exceed {limit} bits")
+        if type(result) is float and not math.isfinite(result):  # NumPy arrays keep their inf/nan
+            raise BudgetExceeded("Result is too large for a float")
+        if np is not None and isinstance(result, (np.ndarray, np.integer)) and result.dtype.kind in "iu":
+            _check_int_array(op_type, fn, args, result)
+        return result
+
+    return guarded
+
+
+_SYMBOLS = str.maketrans({"×": "*", "÷": "/", "−": "-"})
+
+
+def normalize(expr: str) -> str:
+    """Remove commas in numbers like "1,234" -> "1234", map × ÷ − to * / -, strip spaces."""
+    return expr.replace(",", "").translate(_SYMBOLS).strip()
+
+
+# ---------- Compiler ----------
+class CompiledExpression:
+    """A validated expression compiled to closures; call it to evaluate."""
+
+    __slots__ = ("source", "variables", "budget", "_fn")
+
+    def __init__(self, source: str, variables: tuple, fn, budget=None):
+        self.source = source
+        self.variables = variables
+        self.budget = budget
+        self._fn = fn
+
+    def __call__(self, **values):
+        missing = [name for name in self.variables if name not in values]
+        if missing:
+            raise ValueError(f"Missing values for: {', '.join(missing)}")
+        if self.budget is not None:
+            values[_DEADLINE] = time.perf_counter() + self.budget.timeout
+        return self._fn(values)
+
+    def __repr__(self):
+        return f"CompiledExpression({self.source!r})"
+
+
+def _compile_node(node, variables, budget=None):
+    """Validate one AST node and return fn(env) -> value."""
+    if isinstance(node, ast.Expression):
+        return _compile_node(node.body, variables, budget)
+    if isinstance(node, ast.Constant):  # Python 3.8+: numbers appear as Constant
+        if isinstance(node.value, (int, float)):
+            value = node.value
+            if budget is not None and _int_bits(value) > budget.max_int_bits:
+                raise BudgetExceeded(f"Number literal exceeds {budget.max_int_bits} bits")
+            if budget is not None and isinstance(value, float) and not math.isfinite(value):
+                raise BudgetExceeded("Number literal is too large for a float")
+            return lambda env: value
+        raise ValueError("Only numeric constants allowed")
+    if isinstance(node, ast.Name) and node.id in variables:
+        name = node.id
+        return lambda env: env[name]
+    if isinstance(node, ast.BinOp):
+        op_type = type(node.op)
+        if op_type not in ALLOWED_OPERATORS:
+            raise ValueError(f"Disallowed operator: {op_type}")
+        fn = ALLOWED_OPERATORS[op_type]
+        left = _compile_node(node.left, variables, budget)
+        right = _compile_node(node.right, variables, budget)
+        if budget is not None:
+            guarded = _guard(op_type, fn, budget)
+            return lambda env: guarded(env, left(env), right(env))
+        return lambda env: fn(left(env), right(env))
+    if isinstance(node, ast.UnaryOp):
+        op_type = type(node.op)
+        if op_type not in ALLOWED_OPERATORS:
+            raise ValueError(f"Disallowed unary operator: {op_type}")
+        fn = ALLOWED_OPERATORS[op_type]
+        operand = _compile_node(node.operand, variables, budget)
+        return lambda env: fn(operand(env))
+    if isinstance(node, ast.Call):
+        raise ValueError("Function calls are not allowed")
+    raise ValueError(f"Unsupported expression: {type(node).__name__}")
+
+
+@lru_cache(maxsize=4096)
+def _compile_cached(source: str, variables: tuple, budget) -> CompiledExpression:
+    try:
+        node = ast.parse(source, mode="eval")
+        fn = _compile_node(node, set(variables), budget)
+    except (RecursionError, MemoryError) as e:
+        raise BudgetExceeded("Expression is nested too deeply") from e
+    return CompiledExpression(source, variables, fn, budget)
+
+
+def compile_expression(expr: str, variables=(), budget=DEFAULT_BUDGET) -> CompiledExpression:
+    """
+    Parse + validate `expr` once and return a cached evaluator.
+    `variables` lists the names the expression may use (default: none).
+    Raises ValueError (or SyntaxError) for expressions outside the whitelist,
+    BudgetExceeded when it is over the size/time `budget` (None = no limits).
+    """
+    source = normalize(expr)
+    if budget is not None and len(source) > budget.max_chars:
+        raise BudgetExceeded(f"Expression longer than {budget.max_chars} characters")
+    return _compile_cached(source, tuple(variables), budget)
+
+
+# ---------- Public helpers ----------
+def safe_eval(expr: str, budget=DEFAULT_BUDGET):
+    """
+    Safely evaluate arithmetic expression expr.
+    Raises ValueError if expression contains disallowed nodes,
+    BudgetExceeded (a ValueError) if it would use too much CPU or memory.
+    """
+    return compile_expression(expr, budget=budget)()
+
+
+def evaluate_many(expressions, errors="raise", budget=DEFAULT_BUDGET):
+    """
+    Evaluate many expressions; each distinct expression is compiled only once.
+    errors="raise" stops at the first failure, errors="return" puts the
+    exception object in the result list instead.
+    """
+    results = []
+    for expr in expressions:
+        try:
+            results.append(safe_eval(expr, budget))
+        except Exception as e:
+            if errors != "return":
+                raise
+            results.append(e)
+    return results
+
+
+def evaluate_array(expr: str, budget=ARRAY_BUDGET, **arrays):
+    """
+    Evaluate ONE expression over NumPy arrays of inputs in a single vectorized pass:
+
+        evaluate_array("x * (y + 1)", x=np.arange(1e6), y=2.5)
+
+    Every keyword becomes a variable the expression may use. NumPy rules apply to
+    the arithmetic (e.g. division by zero gives inf/nan instead of an exception),
+    except that integer overflow raises BudgetExceeded (unchecked with budget=None).
+    """
+    if np is None:
+        raise RuntimeError("evaluate_array needs NumPy (pip install numpy)")
+    compiled = compile_expression(expr, variables=tuple(sorted(arrays)), budget=budget)
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        return compiled(**{name: np.asarray(value) for name, value in arrays.items()})
+
+
+def cache_info():
+    """Hit/miss counters of the compiled-expression cache."""
+    return _compile_cached.cache_info()
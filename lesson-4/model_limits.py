@@ -0,0 +1,85 @@
+"""
+Per-model concurrency limits with backpressure for the async Gradio handlers.
+
+Every backend model gets one `ModelLimiter`: at most `max_concurrency` calls
+run at the same time and at most `max_waiting` more may queue for a slot.
+Anything beyond that is rejected at once with `Overloaded`, so a traffic spike
+turns into fast "busy, try again" errors instead of a pile of blocked workers.
+
+Usage:
+    limiter = limiter_for(llm)
+    async with limiter.slot():
+        reply = await llm.ainvoke(prompt)
+
+Configure with MODEL_CONCURRENCY / MODEL_MAX_WAITING (defaults for every model)
+or `configure("qwen3:4b", max_concurrency=2, max_waiting=8)`.
+
+Standalone copy, identical in lesson-3 and lesson-4 (each lesson runs from
+its own folder); keep both in sync.
+"""
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
+MODEL_CONCURRENCY = int(os.getenv("MODEL_CONCURRENCY", "4"))
+MODEL_MAX_WAITING = int(os.getenv("MODEL_MAX_WAITING", "16"))
+# Gradio side: async handlers running at once per event, and requests allowed in its queue
+GRADIO_CONCURRENCY = int(os.getenv("GRADIO_CONCURRENCY", "32"))
+GRADIO_QUEUE_SIZE = int(os.getenv("GRADIO_QUEUE_SIZE", "64"))
+
+
+class Overloaded(RuntimeError):
+    """Raised when a model already has `max_waiting` requests queued."""
+
+
+class ModelLimiter:
+    """Async semaphore with a bounded waiting line."""
+
+    def __init__(self, name, max_concurrency=MODEL_CONCURRENCY, max_waiting=MODEL_MAX_WAITING):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_waiting = max_waiting
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.running = 0
+        self.waiting = 0
+        self.rejected = 0
+
+    @asynccontextmanager
+    async def slot(self):
+        if self._semaphore.locked() and self.waiting >= self.max_waiting:
+            self.rejected += 1
+            raise Overloaded(f"{self.name} is busy ({self.running} running, {self.waiting} waiting); try again shortly")
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.running += 1
+        try:
+            yield
+        finally:
+            self.running -= 1
+            self._semaphore.release()
+
+
+_limiters = {}
+_settings = {}
+
+
+def gradio_queue_settings():
+    """Arguments for `demo.queue(...)`: a full Gradio queue also rejects new requests."""
+    return {"default_concurrency_limit": GRADIO_CONCURRENCY, "max_size": GRADIO_QUEUE_SIZE}
+
+
+def configure(model_name, max_concurrency=MODEL_CONCURRENCY, max_waiting=MODEL_MAX_WAITING):
+    """Set the limits for one model (call before the first request)."""
+    _settings[model_name] = (max_concurrency, max_waiting)
+    _limiters.pop(model_name, None)
+
+
+def limiter_for(llm):
+    """The shared limiter for this model name (all wrappers of one model share it)."""
+    name = getattr(llm, "model", None) or type(llm).__name__
+    if name not in _limiters:
+        _limiters[name] = ModelLimiter(name, *_settings.get(name, (MODEL_CONCURRENCY, MODEL_MAX_WAITING)))
+    return _limiters[name]
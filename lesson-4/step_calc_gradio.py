@@ -1,60 +1,24 @@
 #!/usr/bin/env python3
 """
 Step-by-step Calculator (Gradio UI)
-Uses Ollama + LangChain to show reasoning steps for math expressions,
-and verifies the final numeric answer using a safe local evaluator.
+Plain arithmetic is solved step by step locally (step_tracer.py); other input
+goes to Ollama + LangChain, and the model's final numeric answer is verified
+using a safe local evaluator.
 """
 
 import gradio as gr
 import re
-import ast
-import operator
 from langchain_ollama import ChatOllama
 from langchain_core.prompts import PromptTemplate
 
-# ---------- Safe arithmetic evaluator ----------
-ALLOWED_OPERATORS = {
-    ast.Add: operator.add,
-    ast.Sub: operator.sub,
-    ast.Mult: operator.mul,
-    ast.Div: operator.truediv,
-    ast.FloorDiv: operator.floordiv,
-    ast.Mod: operator.mod,
-    ast.Pow: operator.pow,
-    ast.UAdd: lambda x: x,
-    ast.USub: operator.neg,
-}
-
-def safe_eval(expr: str):
-    expr = expr.replace(",", "")
-    node = ast.parse(expr, mode='eval')
-
-    def _eval(node):
-        if isinstance(node, ast.Expression):
-            return _eval(node.body)
-        if isinstance(node, ast.Constant):
-            if isinstance(node.value, (int, float)):
-                return node.value
-            raise ValueError("Only numeric constants allowed")
-        if isinstance(node, ast.BinOp):
-            op_type = type(node.op)
-            if op_type not in ALLOWED_OPERATORS:
-                raise ValueError(f"Disallowed operator: {op_type}")
-            left = _eval(node.left)
-            right = _eval(node.right)
-            return ALLOWED_OPERATORS[op_type](left, right)
-        if isinstance(node, ast.UnaryOp):
-            op_type = type(node.op)
-            if op_type not in ALLOWED_OPERATORS:
-                raise ValueError(f"Disallowed unary operator: {op_type}")
-            operand = _eval(node.operand)
-            return ALLOWED_OPERATORS[op_type](operand)
-        raise ValueError(f"Unsupported expression: {type(node).__name__}")
-
-    return _eval(node)
+from calc_engine import safe_eval
+from step_tracer import format_number, try_trace
+from llm_cache import CachedLLM
+from model_limits import Overloaded, gradio_queue_settings
 
 # ---------- LLM setup ----------
-llm = ChatOllama(model="qwen3:4b")
+# Cached + coalesced: identical submissions share one model call
+llm = CachedLLM(ChatOllama(model="qwen3:4b"))
 
 template = """
 You are a calm math tutor.
@@ -90,23 +54,55 @@ def solve_expression(expression, show_steps):
     if not expression.strip():
         return "Please enter an expression.", ""
 
+    # Fast path: plain arithmetic is traced locally in well under a millisecond
+    trace = try_trace(expression)
+    if trace is not None:
+        return trace.text(show_steps), traced_answer(trace)
+
     mode = "show_steps" if show_steps else "final_only"
     formatted = prompt.format(expression=expression, mode=mode)
     model_output = llm.invoke(formatted)
+    llm.log_stats()
+    return model_output, verify(expression, model_output)
+
+async def solve_expression_async(expression, show_steps=True):
+    """Async handler: waits on the model without blocking a worker thread."""
+    if not expression.strip():
+        return "Please enter an expression.", ""
+
+    trace = try_trace(expression)
+    if trace is not None:
+        return trace.text(show_steps), traced_answer(trace)
 
-    parsed = extract_final_numeric(str(model_output))
+    mode = "show_steps" if show_steps else "final_only"
+    formatted = prompt.format(expression=expression, mode=mode)
+    try:
+        model_output = await llm.ainvoke(formatted)
+    except Overloaded as e:
+        raise gr.Error(str(e))
+    llm.log_stats()
+    return model_output, verify(expression, model_output)
+
+def traced_answer(trace):
+    """The tracer runs the local evaluator itself, so its answer is labelled computed, not verified."""
+    if trace.error:
+        return f"⚠️ Cannot compute: {trace.error}"
+    return f"🧮 Computed: {format_number(trace.result)}"
+
+def verify(expression, model_output):
+    """Compare the model's final number with the local safe evaluator."""
+    parsed = extract_final_numeric(model_output)
     try:
         computed = safe_eval(expression)
         match = (parsed is not None) and abs(float(parsed) - float(computed)) < 1e-9
         verified_text = f"✅ Verified: {computed}" if match else f"❌ Mismatch (Computed: {computed}, Model: {parsed})"
     except Exception as e:
         verified_text = f"⚠️ Could not verify: {e}"
-
-    return str(model_output), verified_text
+    return verified_text
 
 # ---------- Gradio UI ----------
 iface = gr.Interface(
-    fn=solve_expression,
+    fn=solve_expression_async,
     inputs=gr.Textbox(label="Enter your math problem", placeholder="e.g. 12 + (6 × 2) - 4"),
     outputs=[
         gr.Textbox(label="Model Reasoning", lines=12, max_lines=25, elem_id="reasoning_box", interactive=False),
@@ -132,4 +128,4 @@ iface = gr.Interface(
 )
 
 if __name__ == "__main__":
-    iface.launch()
+    iface.queue(**gradio_queue_settings()).launch()
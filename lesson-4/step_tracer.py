@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+step_tracer.py
+
+Deterministic step-by-step solutions for plain arithmetic, without the model.
+
+The expression is validated and evaluated by calc_engine (same whitelist and
+resource budget as `safe_eval`), then the AST is walked in evaluation order and
+every operation becomes one numbered step:
+
+    >>> print(trace_expression("12 * (3 + 4)").text())
+    1) 3 + 4 = 7
+    2) 12 * 7 = 84
+    Final Answer: 84
+
+This takes well under a millisecond, so the calculator uses it as the fast
+path and only asks the model when the input is not something the tracer can
+read (e.g. a word problem). Arithmetic that cannot be computed (division by
+zero, over the budget) gets an immediate error result instead of a model call.
+"""
+import ast
+from dataclasses import dataclass, field
+
+from calc_engine import ALLOWED_OPERATORS, DEFAULT_BUDGET, BudgetExceeded, compile_expression, normalize
+
+SYMBOLS = {
+    ast.Add: "+",
+    ast.Sub: "-",
+    ast.Mult: "*",
+    ast.Div: "/",
+    ast.FloorDiv: "//",
+    ast.Mod: "%",
+    ast.Pow: "**",
+}
+
+
+def format_number(value):
+    """42.0 -> '42', 3.5 -> '3.5', big ints unchanged."""
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return str(value)
+
+
+def _operand(value):
+    text = format_number(value)
+    return f"({text})" if text.startswith("-") else text
+
+
+@dataclass
+class StepTrace:
+    """The numbered steps and the result (or why there is none) of one expression."""
+    source: str
+    steps: list = field(default_factory=list)
+    result: object = None
+    error: str = None
+
+    def text(self, show_steps=True):
+        """Same layout the model is asked for: numbered steps, then 'Final Answer:'."""
+        if self.error:
+            return f"Cannot compute {self.source}: {self.error}"
+        final = f"Final Answer: {format_number(self.result)}"
+        if not show_steps:
+            return final
+        lines = [f"{i}) {step}" for i, step in enumerate(self.steps, 1)]
+        return "\n".join(lines + [final])
+
+
+def _walk(node, steps):
+    """Evaluate `node` left to right, appending one step per operation."""
+    if isinstance(node, ast.Constant):
+        return node.value
+    if isinstance(node, ast.UnaryOp):
+        value = _walk(node.operand, steps)
+        result = ALLOWED_OPERATORS[type(node.op)](value)
+        # "-3" is just a negative number; "-(3 + 4)" is a step of its own
+        if isinstance(node.op, ast.USub) and not isinstance(node.operand, ast.Constant):
+            steps.append(f"-({format_number(value)}) = {format_number(result)}")
+        return result
+    if isinstance(node, ast.BinOp):
+        left = _walk(node.left, steps)
+        right = _walk(node.right, steps)
+        op_type = type(node.op)
+        result = ALLOWED_OPERATORS[op_type](left, right)
+        steps.append(f"{_operand(left)} {SYMBOLS[op_type]} {_operand(right)} = {format_number(result)}")
+        return result
+    raise ValueError(f"Unsupported expression: {type(node).__name__}")
+
+
+def trace_expression(expr: str, budget=DEFAULT_BUDGET) -> StepTrace:
+    """
+    Solve `expr` step by step.
+    Raises the same errors as safe_eval (ValueError, SyntaxError, BudgetExceeded,
+    ZeroDivisionError) for input the tracer cannot handle.
+    """
+    compiled = compile_expression(expr, budget=budget)
+    # Evaluating under the budget first means every intermediate value below
+    # has already been size-checked, so the plain operators are safe to use.
+    result = compiled()
+    steps = []
+    _walk(ast.parse(compiled.source, mode="eval").body, steps)
+    return StepTrace(compiled.source, steps, result)
+
+
+def try_trace(expr: str, budget=DEFAULT_BUDGET):
+    """
+    trace_expression, or None when the expression needs the model instead.
+    Arithmetic that cannot be computed returns a StepTrace with `error` set:
+    asking the model would only be slower, not more correct.
+    """
+    try:
+        return trace_expression(expr, budget)
+    except (ArithmeticError, BudgetExceeded) as e:
+        return StepTrace(normalize(expr), error=str(e) or type(e).__name__)
+    except (SyntaxError, ValueError):
+        return None
@@ -1,59 +1,67 @@
 # Latest, non-deprecated imports
-from langchain_community.document_loaders import PyPDFLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import Chroma
+import os
+
 from langchain_ollama import OllamaEmbeddings, OllamaLLM
 from langchain.chains import RetrievalQA
 
-# ------------------------------
-# 1️⃣ Load PDF
-print("\nLoad PDF")
-pdf_path = "data/example.pdf"  # replace with your PDF path
-loader = PyPDFLoader(pdf_path)
-documents = loader.load()
-
-# ------------------------------
-# 2️⃣ Split into chunks
-print("\nSplit into chunks")
-text_splitter = RecursiveCharacterTextSplitter(
-    chunk_size=1000,
-    chunk_overlap=100
-)
-docs = text_splitter.split_documents(documents)
-
-# ------------------------------
-# 3️⃣ Generate embeddings
-embedder = OllamaEmbeddings(model="mxbai-embed-large:latest")
-
-# ------------------------------
-# 4️⃣ Create Chroma vector store (auto-persistence)
-print("\nCreate Chroma vector store")
-vector_store = Chroma.from_documents(
-    documents=docs,
-    embedding=embedder,
-    persist_directory="chroma_db"  # optional, for reloading later
-)
-
-# ------------------------------
-# 5️⃣ Setup Retriever + LLM
-llm = OllamaLLM(model="qwen3:4b")
-
-print("\nRetriever data")
-retriever = vector_store.as_retriever(search_type="similarity", search_kwargs={"k": 3})
-
-qa = RetrievalQA.from_chain_type(
-    llm=llm,
-    chain_type="stuff",
-    retriever=retriever,
-    return_source_documents=True
-)
-
-# ------------------------------
-# 6️⃣ Ask a question
-query = input("Enter your question about the PDF: ")
-
-# Use the new recommended method
-result = qa.invoke({"query": query})
-
-print("\nAnswer:")
-print(result["result"])
+from embedding_cache import CachedEmbeddings
+from indexing import open_index
+
+
+def main():
+    """Index the PDF and answer one question about it."""
+    # ------------------------------
+    # 1️⃣ Embedding model (cached on disk: a chunk is only ever embedded once)
+    embedder = CachedEmbeddings(OllamaEmbeddings(model="mxbai-embed-large:latest"))
+
+    # ------------------------------
+    # 2️⃣-4️⃣ Vector store
+    # RETRIEVER=faiss serves the prebuilt FAISS index in vectorstore/ (data/azure.pdf),
+    # memory-mapped, with nothing to load or embed at startup.
+    RETRIEVER = os.getenv("RETRIEVER", "chroma")
+
+    if RETRIEVER == "faiss":
+        from faiss_store import FaissStore
+
+        print("\nOpen FAISS index")
+        vector_store = FaissStore("vectorstore", embedder)
+    else:
+        # Load PDF, split into chunks and index them in Chroma (auto-persistence).
+        # Only new or changed chunks are embedded; an unchanged PDF just opens the store.
+        print("\nIndex PDF")
+        pdf_path = "data/example.pdf"  # replace with your PDF path
+        vector_store = open_index(
+            [pdf_path],
+            embedder,
+            persist_directory="chroma_db",  # reused on the next start
+            chunk_size=1000,
+            chunk_overlap=100
+        )
+
+    # ------------------------------
+    # 5️⃣ Setup Retriever + LLM
+    llm = OllamaLLM(model="qwen3:4b")
+
+    print("\nRetriever data")
+    retriever = vector_store.as_retriever(search_type="similarity", search_kwargs={"k": 3})
+
+    qa = RetrievalQA.from_chain_type(
+        llm=llm,
+        chain_type="stuff",
+        retriever=retriever,
+        return_source_documents=True
+    )
+
+    # ------------------------------
+    # 6️⃣ Ask a question
+    query = input("Enter your question about the PDF: ")
+
+    # Use the new recommended method
+    result = qa.invoke({"query": query})
+
+    print("\nAnswer:")
+    print(result["result"])
+
+
+if __name__ == "__main__":  # PDF worker processes import this module too
+    main()
@@ -1,70 +1,112 @@
 # Latest, non-deprecated imports
-from langchain_community.document_loaders import PyPDFLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import Chroma
+import os
+import time
+
 from langchain_ollama import OllamaEmbeddings, OllamaLLM
 from langchain.chains import RetrievalQA
 
-# ------------------------------
-# 1️⃣ Load PDF
-print("\nLoad PDF")
-pdf_path = "data/example.pdf"  # replace with your PDF path
-loader = PyPDFLoader(pdf_path)
-documents = loader.load()
-
-# ------------------------------
-# 2️⃣ Split into chunks
-print("\nSplit into chunks")
-text_splitter = RecursiveCharacterTextSplitter(
-    chunk_size=1000,
-    chunk_overlap=100
-)
-docs = text_splitter.split_documents(documents)
-
-# ------------------------------
-# 3️⃣ Generate embeddings
-embedder = OllamaEmbeddings(model="mxbai-embed-large:latest")
-
-# ------------------------------
-# 4️⃣ Create Chroma vector store (auto-persistence)
-print("\nCreate Chroma vector store")
-vector_store = Chroma.from_documents(
-    documents=docs,
-    embedding=embedder,
-    persist_directory="chroma_db"  # optional, for reloading later
-)
-
-# ------------------------------
-# 5️⃣ Setup Retriever + LLM
-llm = OllamaLLM(model="qwen3:4b")
-
-print("\nRetriever data")
-retriever = vector_store.as_retriever(search_type="similarity", search_kwargs={"k": 3})
-
-qa = RetrievalQA.from_chain_type(
-    llm=llm,
-    chain_type="stuff",
-    retriever=retriever,
-    return_source_documents=True
-)
-
-# ------------------------------
-# 6️⃣ Ask a question
-# ------------------------------
-# Full interactive loop for continuous questions
-
-while True:
-    # Ask user for query
-    query = input("\nEnter your question about the PDF (or type 'exit' to quit): ")
-
-    # Stop the program if user types 'exit' or 'quit'
-    if query.lower() in ["exit", "quit"]:
-        print("Exiting program. Goodbye!")
-        break
-
-    # Invoke the chain
-    result = qa.invoke({"query": query})
-
-    # Print the answer
-    print("\nAnswer:")
-    print(result["result"])
+from embedding_cache import CachedEmbeddings
+from indexing import open_index
+from retrieval_cache import CachedRetriever
+from streaming_qa import format_sources, stream_qa
+
+# Print the answer token by token as it is generated (STREAM=0: wait for the full answer)
+STREAM = os.getenv("STREAM", "1") != "0"
+
+
+def main():
+    """Index the PDF and answer questions until 'exit'."""
+    # ------------------------------
+    # 1️⃣ Embedding model (cached on disk: a chunk is only ever embedded once)
+    embedder = CachedEmbeddings(OllamaEmbeddings(model="mxbai-embed-large:latest"))
+
+    # ------------------------------
+    # 2️⃣-4️⃣ Vector store
+    # RETRIEVER=faiss serves the prebuilt FAISS index in vectorstore/ (data/azure.pdf),
+    # memory-mapped, with nothing to load or embed at startup.
+    RETRIEVER = os.getenv("RETRIEVER", "chroma")
+
+    if RETRIEVER == "faiss":
+        from faiss_store import FaissStore
+
+        print("\nOpen FAISS index")
+        vector_store = FaissStore("vectorstore", embedder)
+        index_directory = None  # FaissStore is watched through its own files
+    else:
+        # Load PDF, split into chunks and index them in Chroma (auto-persistence).
+        # Only new or changed chunks are embedded; an unchanged PDF just opens the store.
+        print("\nIndex PDF")
+        pdf_path = "data/example.pdf"  # replace with your PDF path
+        index_directory = "chroma_db"  # reused on the next start
+        vector_store = open_index(
+            [pdf_path],
+            embedder,
+            persist_directory=index_directory,
+            chunk_size=1000,
+            chunk_overlap=100
+        )
+
+    # ------------------------------
+    # 5️⃣ Setup Retriever + LLM
+    llm = OllamaLLM(model="qwen3:4b")
+
+    print("\nRetriever data")
+    # Same similarity search, with query embeddings and top-k results cached per
+    # normalized question (results are dropped when new content is indexed)
+    retriever = CachedRetriever(vector_store=vector_store, embedder=embedder, k=3, index_directory=index_directory)
+
+    qa = RetrievalQA.from_chain_type(
+        llm=llm,
+        chain_type="stuff",
+        retriever=retriever,
+        return_source_documents=True
+    )
+
+    # ------------------------------
+    # 6️⃣ Ask a question
+    # ------------------------------
+    # Full interactive loop for continuous questions
+
+    while True:
+        # Ask user for query
+        query = input("\nEnter your question about the PDF (or type 'exit' to quit): ")
+
+        # Stop the program if user types 'exit' or 'quit'
+        if query.lower() in ["exit", "quit"]:
+            print(retriever.stats_text())
+            print("Exiting program. Goodbye!")
+            break
+
+        start = time.perf_counter()
+        first_token = None
+        if STREAM:
+            # Retrieve first, then print tokens as the LLM generates them
+            docs, tokens = stream_qa(llm, retriever, query)
+            print("\nAnswer:")
+            for token in tokens:
+                if first_token is None:
+                    first_token = time.perf_counter() - start
+                print(token, end="", flush=True)
+            print()
+        else:
+            # Invoke the chain and print the full answer
+            result = qa.invoke({"query": query})
+            docs = result["source_documents"]
+            print("\nAnswer:")
+            print(result["result"])
+        total = time.perf_counter() - start
+
+        print("\nSources:")
+        print(format_sources(docs))
+
+        # Per-stage timings (generate = everything after retrieval)
+        t = retriever.last_timings
+        generate = total - t["embed"] - t["search"]
+        ttft = f" | first token {first_token:.2f} s" if first_token is not None else ""
+        print(f"\n⏱️ embed {t['embed'] * 1000:.1f} ms{' (cached)' if t['embed_cached'] else ''} | "
+              f"search {t['search'] * 1000:.1f} ms{' (cached)' if t['search_cached'] else ''}{ttft} | "
+              f"generate {generate:.2f} s | total {total:.2f} s")
+
+
+if __name__ == "__main__":  # PDF worker processes import this module too
+    main()
@@ -0,0 +1,148 @@
+"""
+Cold start and query latency: FAISS (faiss_store.py) vs Chroma.
+
+Both backends are filled with exactly the same vectors and documents - the
+ones in the prebuilt FAISS index - so no PDF loading or embedding model is
+needed. Query vectors are stored vectors plus a little noise, and only the
+vector search is timed (query embedding costs the same for both).
+
+- cold start: a fresh Python process opens the store and answers one query
+  (imports included), measured several times
+- query latency: p50/p95 over many top-k searches in one warm process
+
+Run from the lesson-5 folder:
+    python bench_retrievers.py
+    python bench_retrievers.py --index-types flat hnsw ivf --queries 500 --k 3
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import faiss
+import numpy as np
+
+from faiss_store import INDEX_FILE, FaissStore, LazyDocStore, make_index, write_meta
+
+COLD_START = {
+    "faiss": """
+import time; start = time.perf_counter()
+import numpy as np
+from faiss_store import FaissStore
+store = FaissStore({folder!r}, None)
+store.similarity_search_by_vector(np.zeros(store.index.d, dtype="float32"), 3)
+print(time.perf_counter() - start)
+""",
+    "chroma": """
+import time; start = time.perf_counter()
+from langchain_community.vectorstores import Chroma
+store = Chroma(collection_name="bench", persist_directory={folder!r})
+store.similarity_search_by_vector([0.0] * {dim}, 3)
+print(time.perf_counter() - start)
+""",
+}
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))]
+
+
+def load_source(folder):
+    """Vectors and documents of the prebuilt flat index."""
+    index = faiss.read_index(os.path.join(folder, INDEX_FILE))
+    vectors = index.reconstruct_n(0, index.ntotal)
+    docstore = LazyDocStore(folder)
+    return vectors, [docstore.get(row) for row in range(len(docstore))]
+
+
+def build_faiss(folder, vectors, documents, index_type):
+    index = make_index(vectors.shape[1], len(vectors), index_type)
+    if not index.is_trained:
+        index.train(vectors)
+    index.add(vectors)
+    faiss.write_index(index, os.path.join(folder, INDEX_FILE))
+    LazyDocStore.write(folder, documents)
+    write_meta(folder, index_type, index)
+
+
+def build_chroma(folder, vectors, documents):
+    import chromadb
+    from langchain_community.vectorstores import Chroma
+
+    # The vectors are already computed: add them through chromadb's own client
+    # (Chroma.add_texts would embed every text again)
+    client = chromadb.PersistentClient(path=folder)
+    collection = client.get_or_create_collection("bench", metadata={"hnsw:space": "l2"})
+    step = client.get_max_batch_size()
+    for start in range(0, len(documents), step):
+        batch = documents[start:start + step]
+        collection.add(
+            ids=[str(i) for i in range(start, start + len(batch))],
+            embeddings=vectors[start:start + step].tolist(),
+            documents=[doc.page_content for doc in batch],
+            metadatas=[doc.metadata or None for doc in batch],
+        )
+    return Chroma(client=client, collection_name="bench")
+
+
+def cold_start(kind, folder, dim, runs):
+    code = COLD_START[kind].format(folder=folder, dim=dim)
+    times = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)))
+        times.append(float(out.stdout.strip().splitlines()[-1]))
+    return statistics.median(times)
+
+
+def query_latency(search, queries, k):
+    search(queries[0], k)  # warm-up
+    times = []
+    for query in queries:
+        start = time.perf_counter()
+        search(query, k)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def report(name, cold, times):
+    print(f"{name:<14} cold start {cold * 1000:8.1f} ms | query p50 {percentile(times, 50) * 1000:7.3f} ms | "
+          f"p95 {percentile(times, 95) * 1000:7.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", default="vectorstore", help="prebuilt FAISS store with the vectors to use")
+    parser.add_argument("--index-types", nargs="+", choices=["flat", "ivf", "hnsw"], default=["flat", "hnsw"])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--cold-runs", type=int, default=3)
+    args = parser.parse_args()
+
+    vectors, documents = load_source(args.source)
+    rng = np.random.default_rng(0)
+    picks = rng.integers(0, len(vectors), args.queries)
+    queries = (vectors[picks] + rng.normal(0, 0.01, (args.queries, vectors.shape[1]))).astype(np.float32)
+    print(f"{len(vectors)} vectors of dimension {vectors.shape[1]}, {args.queries} queries, k={args.k}\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for index_type in args.index_types:
+            folder = os.path.join(tmp, f"faiss_{index_type}")
+            os.makedirs(folder)
+            build_faiss(folder, vectors, documents, index_type)
+            store = FaissStore(folder, None)
+            times = query_latency(store.similarity_search_by_vector, queries, args.k)
+            report(f"faiss/{index_type}", cold_start("faiss", folder, vectors.shape[1], args.cold_runs), times)
+
+        folder = os.path.join(tmp, "chroma")
+        store = build_chroma(folder, vectors, documents)
+        times = query_latency(lambda query, k: store.similarity_search_by_vector(query.tolist(), k), queries, args.k)
+        report("chroma", cold_start("chroma", folder, vectors.shape[1], args.cold_runs), times)
+
+
+if __name__ == "__main__":
+    main()
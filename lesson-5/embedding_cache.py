@@ -0,0 +1,139 @@
+"""
+Content-addressed, on-disk cache in front of any LangChain embedder.
+
+Identical chunks used to be embedded again whenever a vector store was rebuilt
+or the same PDF was uploaded twice. Wrapping the embedder makes every chunk
+cost one embedding call per model, ever:
+
+    embedder = CachedEmbeddings(OllamaEmbeddings(model="mxbai-embed-large:latest"))
+
+Layout (one folder per embedding model under EMBED_CACHE_DIR):
+    vectors.f32   all vectors, float32, one row per chunk; memory-mapped for reads
+    keys.bin      sha256 of each chunk text (32 bytes), row i <-> key i
+    meta.json     model name and vector dimension
+
+Both files are append-only and the index is rebuilt from keys.bin on start, so
+an interrupted write only loses the rows that were not complete. One process
+should write a cache folder at a time.
+
+Queries (`embed_query`) are passed through uncached.
+Set EMBED_CACHE=0 to switch the cache off.
+
+Standalone copy: lesson-5, lesson-5a and lesson-6 each run on their own
+(own folder, own requirements.txt), so each keeps this file. The three copies
+are identical; change them together.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+EMBED_CACHE_DIR = os.getenv("EMBED_CACHE_DIR", "embedding_cache")
+EMBED_CACHE_ENABLED = os.getenv("EMBED_CACHE", "1") != "0"
+KEY_SIZE = 32
+
+
+def text_key(text):
+    """sha256 digest of a chunk: the cache key within one model's folder."""
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+def model_name(embedder):
+    return getattr(embedder, "model", None) or type(embedder).__name__
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper: (model, chunk hash) -> vector, kept in a memory-mapped file."""
+
+    def __init__(self, embedder, cache_dir=EMBED_CACHE_DIR, enabled=EMBED_CACHE_ENABLED):
+        self.embedder = embedder
+        self.model = model_name(embedder)
+        self.enabled = enabled
+        self.folder = os.path.join(cache_dir, re.sub(r"[^\w.-]+", "_", self.model))
+        self._lock = threading.Lock()
+        self._rows = {}             # key -> row in vectors.f32
+        self._vectors = None        # np.memmap of the rows on disk
+        self._dim = None
+        self.hits = 0
+        self.misses = 0
+        if enabled:
+            self._load()
+
+    # ---------- Embeddings interface ----------
+    def embed_documents(self, texts):
+        if not self.enabled:
+            return self.embedder.embed_documents(texts)
+        keys = [text_key(text) for text in texts]
+        with self._lock:
+            missing = {}
+            for key, text in zip(keys, texts):
+                if key not in self._rows and key not in missing:
+                    missing[key] = text
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+        if missing:
+            vectors = self.embedder.embed_documents(list(missing.values()))
+            with self._lock:
+                self._append(list(missing), vectors)
+        with self._lock:
+            return [self._vectors[self._rows[key]].tolist() for key in keys]
+
+    def embed_query(self, text):
+        return self.embedder.embed_query(text)
+
+    # ---------- stats ----------
+    def stats_text(self):
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0.0
+        return (f"Embedding cache ({self.model}): {len(self._rows)} vectors | "
+                f"{self.hits} hits, {self.misses} embedded | hit rate {rate:.0%}")
+
+    # ---------- disk (called with self._lock held, except from __init__) ----------
+    def _path(self, name):
+        return os.path.join(self.folder, name)
+
+    def _load(self):
+        try:
+            with open(self._path("meta.json"), encoding="utf-8") as f:
+                self._dim = json.load(f)["dim"]
+            with open(self._path("keys.bin"), "rb") as f:
+                keys = f.read()
+            vector_rows = os.path.getsize(self._path("vectors.f32")) // (4 * self._dim)
+        except (OSError, ValueError, KeyError):
+            return
+        rows = min(len(keys) // KEY_SIZE, vector_rows)
+        self._rows = {keys[i * KEY_SIZE:(i + 1) * KEY_SIZE]: i for i in range(rows)}
+        self._map(rows)
+
+    def _map(self, rows):
+        if rows:
+            self._vectors = np.memmap(self._path("vectors.f32"), dtype=np.float32, mode="r", shape=(rows, self._dim))
+
+    def _append(self, keys, vectors):
+        # Another thread may have added some of these keys meanwhile
+        new = [(key, vector) for key, vector in zip(keys, vectors) if key not in self._rows]
+        if not new:
+            return
+        array = np.asarray([vector for _, vector in new], dtype=np.float32)
+        if self._dim is None:
+            self._dim = array.shape[1]
+            os.makedirs(self.folder, exist_ok=True)
+            with open(self._path("meta.json"), "w", encoding="utf-8") as f:
+                json.dump({"model": self.model, "dim": self._dim}, f)
+            for name in ("vectors.f32", "keys.bin"):
+                open(self._path(name), "wb").close()
+        rows = len(self._rows)
+        # Vectors first, keys second: a key on disk always has its vector
+        with open(self._path("vectors.f32"), "r+b") as f:
+            f.seek(rows * 4 * self._dim)
+            f.write(array.tobytes())
+        with open(self._path("keys.bin"), "r+b") as f:
+            f.seek(rows * KEY_SIZE)
+            f.write(b"".join(key for key, _ in new))
+        for offset, (key, _) in enumerate(new):
+            self._rows[key] = rows + offset
+        self._map(len(self._rows))
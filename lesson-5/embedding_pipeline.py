@@ -0,0 +1,94 @@
+"""
+Batched, parallel embedding stage for the vector store.
+
+`Chroma.from_documents` / `add_documents` embed everything in one go: no
+control over batch size or concurrency, no progress, and the whole corpus sits
+in memory as one list. Here chunks are:
+
+- grouped into batches of `batch_size` texts (one embedding request each),
+- embedded and upserted by `workers` threads with the store's own
+  `add_texts(..., ids=...)` (Ollama handles OLLAMA_NUM_PARALLEL requests at once),
+- retried with exponential backoff when a batch fails (upserts by id, so a
+  retried batch never creates duplicates).
+
+Only about `workers * 2` batches are in flight at any time, so the input can be
+a generator of any length. Progress is shown with tqdm and the summary reports
+chunks/sec.
+
+The vectors come from the store's embedding function, so create the store with
+the embedder to use (e.g. `Chroma(..., embedding_function=embedder)`).
+
+Usage:
+    stats = embed_into_store(vector_store, ((chunk_id, doc), ...))
+"""
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+
+from tqdm import tqdm
+
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", "4"))
+EMBED_RETRIES = int(os.getenv("EMBED_RETRIES", "3"))
+
+
+def batched(iterable, size):
+    """Yield lists of up to `size` items."""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def add_batch(vector_store, batch, retries=EMBED_RETRIES, backoff=1.0):
+    """Embed and upsert one batch; retries with 1 s, 2 s, 4 s... pauses. Returns the retries used."""
+    texts = [doc.page_content for _, doc in batch]
+    for attempt in range(retries + 1):
+        try:
+            vector_store.add_texts(texts, metadatas=[doc.metadata for _, doc in batch], ids=[cid for cid, _ in batch])
+            return attempt
+        except Exception as e:
+            if attempt == retries:
+                raise RuntimeError(f"Embedding batch of {len(texts)} chunks failed after {retries + 1} attempts: {e}") from e
+            time.sleep(backoff * 2 ** attempt)
+
+
+def embed_into_store(vector_store, items, batch_size=EMBED_BATCH_SIZE, workers=EMBED_WORKERS,
+                     retries=EMBED_RETRIES, total=None, desc="Embedding", progress=True):
+    """
+    Embed `items` ((id, Document) pairs, any iterable) and upsert them batch by batch.
+    `total` (number of items) sizes the progress bar; pass progress=False when
+    the caller shows its own.
+    Returns {"chunks", "batches", "retries", "seconds", "chunks_per_sec"}.
+    Raises RuntimeError when a batch still fails after `retries` retries.
+    """
+    stats = {"chunks": 0, "batches": 0, "retries": 0}
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool, tqdm(total=total, desc=desc, unit="chunk", disable=not progress) as bar:
+        in_flight = {}
+
+        def collect(futures):
+            for future in futures:
+                batch = in_flight.pop(future)
+                retried = future.result()
+                stats["chunks"] += len(batch)
+                stats["batches"] += 1
+                stats["retries"] += retried
+                bar.update(len(batch))
+
+        for batch in batched(items, batch_size):
+            future = pool.submit(add_batch, vector_store, batch, retries)
+            in_flight[future] = batch
+            if len(in_flight) >= workers * 2:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(done)
+        collect(wait(in_flight).done)
+
+    stats["seconds"] = time.perf_counter() - start
+    stats["chunks_per_sec"] = stats["chunks"] / stats["seconds"] if stats["seconds"] else 0.0
+    return stats
+
+
+def stats_text(stats):
+    return (f"Embedded {stats['chunks']} chunks in {stats['batches']} batches, {stats['seconds']:.1f}s "
+            f"({stats['chunks_per_sec']:.1f} chunks/s, {stats['retries']} retries)")
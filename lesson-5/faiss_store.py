@@ -0,0 +1,227 @@
+"""
+FAISS retriever mode for the PDF question-answering apps.
+
+The prebuilt index in `vectorstore/` is memory-mapped instead of read into
+memory, so opening it is near-instant whatever its size. The documents live in
+a plain, non-pickle store that is read lazily, one row at a time:
+
+    vectorstore/
+        index.faiss        FAISS index (row i = document i)
+        docstore.jsonl     one {"id", "page_content", "metadata"} JSON object per line
+        docstore.offsets   uint64 byte offset of every line (memory-mapped)
+        store.json         index type and vector dimension
+
+Index types for `build`: "flat" (exact, default), "ivf" (inverted lists,
+faster on large corpora; tune `nprobe`) and "hnsw" (graph, fast and no
+training; tune `ef_search`).
+
+    python faiss_store.py convert vectorstore        # LangChain index.pkl -> docstore.* (one time)
+    python faiss_store.py build data/azure.pdf --out vectorstore --index-type hnsw
+
+Usage in the apps (RETRIEVER=faiss):
+    store = FaissStore("vectorstore", embedder)
+    retriever = store.as_retriever(k=3)
+"""
+import argparse
+import json
+import math
+import os
+import threading
+from typing import Any
+
+import faiss
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+INDEX_FILE = "index.faiss"
+DOCSTORE_FILE = "docstore.jsonl"
+OFFSETS_FILE = "docstore.offsets"
+META_FILE = "store.json"
+INDEX_TYPES = ("flat", "ivf", "hnsw")
+
+
+# ---------- Document store ----------
+class LazyDocStore:
+    """Documents by row number, read from disk only when asked for."""
+
+    def __init__(self, folder):
+        self.path = os.path.join(folder, DOCSTORE_FILE)
+        self._offsets = np.memmap(os.path.join(folder, OFFSETS_FILE), dtype="<u8", mode="r")
+        self._file = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def get(self, row):
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, "rb")
+            self._file.seek(int(self._offsets[row]))
+            line = self._file.readline()
+        data = json.loads(line)
+        return Document(id=data["id"], page_content=data["page_content"], metadata=data["metadata"])
+
+    @staticmethod
+    def write(folder, documents):
+        """Write `documents` (in index row order) as docstore.jsonl + docstore.offsets."""
+        offsets = []
+        with open(os.path.join(folder, DOCSTORE_FILE), "wb") as f:
+            for doc in documents:
+                offsets.append(f.tell())
+                record = {"id": doc.id, "page_content": doc.page_content, "metadata": doc.metadata}
+                f.write(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n")
+        np.asarray(offsets, dtype="<u8").tofile(os.path.join(folder, OFFSETS_FILE))
+
+
+# ---------- Index ----------
+def make_index(dim, count, index_type="flat"):
+    """An empty FAISS index (L2 distance, like LangChain's FAISS store)."""
+    if index_type == "flat":
+        return faiss.IndexFlatL2(dim)
+    if index_type == "ivf":
+        # ~4*sqrt(n) lists, but at least 39 training points per list
+        nlist = max(1, min(int(4 * math.sqrt(count)), count // 39))
+        return faiss.IndexIVFFlat(faiss.IndexFlatL2(dim), dim, nlist)
+    if index_type == "hnsw":
+        return faiss.IndexHNSWFlat(dim, 32)
+    raise ValueError(f"Unknown index type {index_type!r}, expected one of {INDEX_TYPES}")
+
+
+def read_index(path, mmap=True):
+    """Memory-map the index if FAISS supports it for this index type, else load it."""
+    if mmap:
+        try:
+            return faiss.read_index(path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        except RuntimeError:
+            pass
+    return faiss.read_index(path)
+
+
+class FaissRetriever(BaseRetriever):
+    """LangChain retriever over a FaissStore (works with RetrievalQA)."""
+
+    store: Any
+    k: int = 3
+
+    def _get_relevant_documents(self, query, *, run_manager=None):
+        return self.store.similarity_search(query, self.k)
+
+
+class FaissStore:
+    """A memory-mapped FAISS index plus a lazy document store."""
+
+    def __init__(self, folder, embedder, mmap=True, nprobe=8, ef_search=64):
+        if not os.path.exists(os.path.join(folder, OFFSETS_FILE)):
+            hint = " (run: python faiss_store.py convert {})".format(folder) \
+                if os.path.exists(os.path.join(folder, "index.pkl")) else ""
+            raise FileNotFoundError(f"No document store in {folder}{hint}")
+        self.folder = folder
+        self.embedder = embedder
+        self.index = read_index(os.path.join(folder, INDEX_FILE), mmap)
+        self.docstore = LazyDocStore(folder)
+        if hasattr(self.index, "nprobe"):
+            self.index.nprobe = nprobe
+        if hasattr(self.index, "hnsw"):
+            self.index.hnsw.efSearch = ef_search
+
+    def __len__(self):
+        return self.index.ntotal
+
+    def similarity_search_by_vector_with_score(self, vector, k=4):
+        query = np.asarray([vector], dtype=np.float32)
+        if query.shape[1] != self.index.d:
+            raise ValueError(f"Query has {query.shape[1]} dimensions, the index {self.index.d}: "
+                             "was it built with another embedding model?")
+        distances, rows = self.index.search(query, k)
+        return [(self.docstore.get(row), float(score)) for row, score in zip(rows[0], distances[0]) if row != -1]
+
+    def similarity_search_by_vector(self, vector, k=4):
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(vector, k)]
+
+    def similarity_search_with_score(self, query, k=4):
+        return self.similarity_search_by_vector_with_score(self.embedder.embed_query(query), k)
+
+    def similarity_search(self, query, k=4):
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    def as_retriever(self, k=3, search_type="similarity", search_kwargs=None):
+        """Same call as Chroma's `as_retriever(search_type=..., search_kwargs={"k": 3})`."""
+        if search_type != "similarity":
+            raise ValueError("FaissStore only supports search_type='similarity'")
+        return FaissRetriever(store=self, k=(search_kwargs or {}).get("k", k))
+
+    @classmethod
+    def build(cls, folder, documents, embedder, index_type="flat", batch_size=64, **options):
+        """Embed `documents`, write index + docstore to `folder` and open the result."""
+        documents = list(documents)
+        vectors = []
+        for start in range(0, len(documents), batch_size):
+            batch = documents[start:start + batch_size]
+            vectors.extend(embedder.embed_documents([doc.page_content for doc in batch]))
+        vectors = np.asarray(vectors, dtype=np.float32)
+        index = make_index(vectors.shape[1], len(vectors), index_type)
+        if not index.is_trained:
+            index.train(vectors)
+        index.add(vectors)
+        os.makedirs(folder, exist_ok=True)
+        faiss.write_index(index, os.path.join(folder, INDEX_FILE))
+        LazyDocStore.write(folder, documents)
+        write_meta(folder, index_type, index)
+        return cls(folder, embedder, **options)
+
+
+def write_meta(folder, index_type, index):
+    with open(os.path.join(folder, META_FILE), "w", encoding="utf-8") as f:
+        json.dump({"index_type": index_type, "dim": index.d, "count": index.ntotal}, f, indent=1)
+
+
+def convert_langchain_store(folder):
+    """
+    One-time conversion of a LangChain `FAISS.save_local` folder: index.pkl
+    (pickled docstore) -> docstore.jsonl + docstore.offsets. The pickle is
+    loaded once here, so only convert folders you trust; index.pkl is removed.
+    """
+    import pickle
+
+    with open(os.path.join(folder, "index.pkl"), "rb") as f:
+        docstore, index_to_id = pickle.load(f)
+    index = faiss.read_index(os.path.join(folder, INDEX_FILE))
+    documents = [docstore.search(index_to_id[row]) for row in range(index.ntotal)]
+    LazyDocStore.write(folder, documents)
+    write_meta(folder, "flat" if isinstance(index, faiss.IndexFlat) else type(index).__name__, index)
+    os.remove(os.path.join(folder, "index.pkl"))
+    return len(documents)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert or build the FAISS vector store")
+    commands = parser.add_subparsers(dest="command", required=True)
+    convert = commands.add_parser("convert", help="replace a LangChain index.pkl with the lazy docstore")
+    convert.add_argument("folder")
+    build = commands.add_parser("build", help="index PDFs into a new FAISS store")
+    build.add_argument("pdfs", nargs="+")
+    build.add_argument("--out", default="vectorstore")
+    build.add_argument("--index-type", choices=INDEX_TYPES, default="flat")
+    build.add_argument("--embed-model", default="mxbai-embed-large:latest")
+    args = parser.parse_args()
+
+    if args.command == "convert":
+        print(f"Converted {convert_langchain_store(args.folder)} documents in {args.folder}")
+        return
+
+    from langchain_ollama import OllamaEmbeddings
+
+    from embedding_cache import CachedEmbeddings
+    from indexing import CHUNK_OVERLAP, CHUNK_SIZE
+    from pdf_ingest import iter_pdf_chunks
+
+    documents = iter_pdf_chunks(args.pdfs, CHUNK_SIZE, CHUNK_OVERLAP)
+    store = FaissStore.build(args.out, documents, CachedEmbeddings(OllamaEmbeddings(model=args.embed_model)),
+                             args.index_type)
+    print(f"Built {args.index_type} index with {len(store)} chunks in {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Incremental indexing for the PDF question-answering apps.
+
+Before, every start re-loaded and re-split the PDF, embedded every chunk again
+and added it to `chroma_db` once more (duplicate vectors on each run). Now a
+small manifest next to the vector store remembers, per document, the hash of
+the file and the ids of its chunks:
+
+- unchanged file    -> nothing is loaded or embedded, the store is just opened
+- changed file      -> it is split again; only chunks whose content is new are
+                       embedded and upserted, chunks that disappeared are deleted
+- removed file      -> its chunks are deleted
+
+Chunk ids are content hashes (document + page + chunk text), so the same chunk
+always gets the same id and an upsert can never create a duplicate; a chunk
+that moves to another page gets a new id, and with it up-to-date metadata. Changing the
+embedding model or the chunk settings rebuilds the index from scratch.
+Pages are extracted and split in parallel (pdf_ingest.py) and new chunks are
+streamed straight into the batched, parallel embedding stage
+(embedding_pipeline.py), so a document is never held in memory as a whole.
+
+Usage:
+    vector_store = open_index(["data/example.pdf"], embedder, "chroma_db")
+"""
+import hashlib
+import json
+import os
+
+from langchain_community.vectorstores import Chroma
+from tqdm import tqdm
+
+from embedding_pipeline import EMBED_BATCH_SIZE, EMBED_WORKERS, embed_into_store, stats_text
+from pdf_ingest import count_pages, iter_pdf_chunks
+
+MANIFEST_NAME = "index_manifest.json"
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 100
+
+
+def hash_file(path, block_size=1 << 20):
+    """sha256 of a file, read in 1 MB blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_id(doc_key, page, text):
+    """Stable id of one chunk: the same text on the same page of a document always maps to the same id."""
+    return hashlib.sha256(f"{doc_key}\0{page}\0{text}".encode("utf-8")).hexdigest()
+
+
+def load_manifest(persist_directory):
+    try:
+        with open(os.path.join(persist_directory, MANIFEST_NAME), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def save_manifest(persist_directory, manifest):
+    """Write the manifest atomically so a crash never leaves half a file."""
+    os.makedirs(persist_directory, exist_ok=True)
+    path = os.path.join(persist_directory, MANIFEST_NAME)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(path + ".tmp", path)
+
+
+def iter_new_chunks(path, doc_key, seen, known, chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP, progress=None):
+    """
+    Stream (chunk id, Document) for the chunks of `path` not in `known`.
+    Every chunk id of the document is recorded in `seen` (repeated chunks once).
+    `progress` (a tqdm with one step per page) advances as pages are read.
+    """
+    page = -1
+    for doc in iter_pdf_chunks([path], chunk_size, chunk_overlap):
+        if progress is not None and doc.metadata["page"] > page:
+            progress.update(doc.metadata["page"] - page)
+            page = doc.metadata["page"]
+        cid = chunk_id(doc_key, doc.metadata.get("page"), doc.page_content)
+        if cid in seen:
+            continue
+        seen[cid] = None
+        if cid not in known:
+            doc.metadata["chunk_id"] = cid
+            yield cid, doc
+    if progress is not None:
+        progress.update(progress.total - progress.n)
+
+
+def open_index(paths, embedder, persist_directory="chroma_db", chunk_size=CHUNK_SIZE,
+               chunk_overlap=CHUNK_OVERLAP, batch_size=EMBED_BATCH_SIZE, workers=EMBED_WORKERS, verbose=True):
+    """
+    Open the Chroma store for `paths`, embedding only what changed since the last run.
+    Returns the vector store.
+    """
+    log = print if verbose else (lambda *args: None)
+    settings = {
+        "embedding_model": getattr(embedder, "model", type(embedder).__name__),
+        "chunk_size": chunk_size,
+        "chunk_overlap": chunk_overlap,
+    }
+    manifest = load_manifest(persist_directory)
+    existed = os.path.isdir(persist_directory)
+    vector_store = Chroma(persist_directory=persist_directory, embedding_function=embedder)
+
+    if manifest is None or manifest.get("settings") != settings:
+        # No manifest (older store full of duplicates) or other model/chunking: start clean
+        if existed:
+            log("Index settings changed or unknown: rebuilding the vector store")
+        vector_store.delete_collection()
+        vector_store = Chroma(persist_directory=persist_directory, embedding_function=embedder)
+        manifest = {"settings": settings, "documents": {}}
+        unsaved = True
+    else:
+        unsaved = False  # the manifest is only rewritten when something changed
+
+    documents = manifest["documents"]
+    wanted = {os.path.normpath(path): path for path in paths}
+    added = removed = 0
+
+    for doc_key in set(documents) - set(wanted):
+        ids = documents.pop(doc_key)["chunks"]
+        if ids:
+            vector_store.delete(ids=ids)
+        removed += len(ids)
+        unsaved = True
+        log(f"Removed {doc_key} from the index")
+
+    for doc_key, path in wanted.items():
+        file_hash = hash_file(path)
+        entry = documents.get(doc_key)
+        if entry and entry["hash"] == file_hash:
+            log(f"{path}: unchanged ({len(entry['chunks'])} chunks), skipped")
+            continue
+
+        old_ids = set(entry["chunks"]) if entry else set()
+        seen = {}  # chunk ids of the new version, in order
+        # Chunks are streamed, so their number is unknown up front: progress is shown per page
+        with tqdm(total=count_pages(path), desc=os.path.basename(path), unit="page") as progress:
+            chunks = iter_new_chunks(path, doc_key, seen, old_ids, chunk_size, chunk_overlap, progress)
+            stats = embed_into_store(vector_store, chunks, batch_size, workers, progress=False)
+        if stats["chunks"]:
+            log(stats_text(stats))
+        stale_ids = list(old_ids - set(seen))
+        if stale_ids:
+            vector_store.delete(ids=stale_ids)
+        documents[doc_key] = {"hash": file_hash, "chunks": list(seen)}
+        # Save after every document so an interrupted run keeps its progress
+        save_manifest(persist_directory, manifest)
+        unsaved = False
+        added += stats["chunks"]
+        removed += len(stale_ids)
+        log(f"{path}: {len(seen)} chunks, {stats['chunks']} embedded, {len(stale_ids)} removed")
+
+    if unsaved:
+        save_manifest(persist_directory, manifest)
+    if added or removed:
+        log(f"Index updated: {added} chunks embedded, {removed} removed")
+    return vector_store
@@ -0,0 +1,144 @@
+"""
+Parallel PDF ingestion: page extraction and splitting on all CPU cores.
+
+`PyPDFLoader(path).load()` parses every page one after another on a single
+core, and large files (data/azure.pdf) spend most of their indexing time
+there. Here each PDF is cut into ranges of `pages_per_task` pages; a process
+pool extracts and splits the ranges in parallel and the chunks are yielded
+in document order as soon as their range is done. Only about `workers * 2`
+ranges are in flight, so memory stays bounded however large the input is.
+
+The pool is created on first use, never at import, and kept for later calls.
+Its workers are started with "spawn" (INGEST_START_METHOD): a clean interpreter
+instead of a fork of a multi-threaded server such as Streamlit, and the same
+behaviour on Linux, macOS and Windows. Spawned workers import the calling
+script, so scripts that ingest PDFs keep their work under `if __name__ == "__main__"`.
+
+Chunks carry the same page-level metadata as PyPDFLoader (source, page,
+page_label, total_pages and the PDF's own metadata), and splitting per page
+gives the same chunks as `splitter.split_documents(loader.load())`.
+
+Usage:
+    for doc in iter_pdf_chunks(["data/azure.pdf"], chunk_size=1000, chunk_overlap=100):
+        ...
+
+Standalone copy, identical in lesson-5 and lesson-5a (each lesson has its
+own folder and requirements.txt); change both together.
+"""
+import multiprocessing
+import os
+import re
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from pypdf import PdfReader
+
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", str(os.cpu_count() or 1)))
+PAGES_PER_TASK = int(os.getenv("INGEST_PAGES_PER_TASK", "8"))
+START_METHOD = os.getenv("INGEST_START_METHOD", "spawn")
+
+_readers = OrderedDict()  # per worker process: (path, mtime, size) -> PdfReader, parsed once
+_MAX_READERS = 4
+_pools = {}               # workers -> shared ProcessPoolExecutor
+_pools_lock = threading.Lock()
+
+
+def _reader(path):
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)  # a changed file is parsed again
+    if key in _readers:
+        _readers.move_to_end(key)
+    else:
+        _readers[key] = PdfReader(path)
+        while len(_readers) > _MAX_READERS:
+            _readers.popitem(last=False)
+    return _readers[key]
+
+
+def get_pool(workers=INGEST_WORKERS):
+    """The shared pool of `workers` processes, created on first use."""
+    with _pools_lock:
+        if workers not in _pools:
+            context = multiprocessing.get_context(START_METHOD)
+            _pools[workers] = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+        return _pools[workers]
+
+
+def count_pages(path):
+    return len(PdfReader(path).pages)
+
+
+def pdf_date(value):
+    """"D:20240905155454+00'00'" -> "2024-09-05T15:54:54+00:00" (other values unchanged)."""
+    m = re.match(r"D:(\d{14})(?:([+-]\d{2})'?(\d{2})'?|Z)?", value)
+    if not m:
+        return value
+    offset = (m.group(2) + m.group(3)) if m.group(2) else "+0000"
+    try:
+        return datetime.strptime(m.group(1) + offset, "%Y%m%d%H%M%S%z").isoformat()
+    except ValueError:
+        return value
+
+
+def pdf_metadata(reader, source):
+    """Document-level metadata, the way PyPDFLoader builds it."""
+    metadata = {"producer": "PyPDF", "creator": "PyPDF", "creationdate": ""}
+    for key, value in (reader.metadata or {}).items():
+        key = key.lstrip("/").lower()
+        metadata[key] = pdf_date(str(value)) if key.endswith("date") else str(value)
+    metadata["source"] = source
+    metadata["total_pages"] = len(reader.pages)
+    return metadata
+
+
+def extract_pages(path, start, stop, chunk_size, chunk_overlap):
+    """Worker: extract pages [start, stop) of one PDF and split them into chunks."""
+    reader = _reader(path)
+    base = pdf_metadata(reader, path)
+    labels = reader.page_labels
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    pages = []
+    for number in range(start, stop):
+        metadata = dict(base, page=number, page_label=labels[number])
+        pages.append(Document(page_content=reader.pages[number].extract_text(), metadata=metadata))
+    return splitter.split_documents(pages)
+
+
+def page_ranges(paths, pages_per_task=PAGES_PER_TASK):
+    """(path, start, stop) tasks covering every page of every PDF, in order."""
+    for path in paths:
+        total = count_pages(path)
+        for start in range(0, total, pages_per_task):
+            yield path, start, min(start + pages_per_task, total)
+
+
+def iter_pdf_chunks(paths, chunk_size=1000, chunk_overlap=100, workers=INGEST_WORKERS, pages_per_task=PAGES_PER_TASK):
+    """Yield split Document chunks of `paths`, in order, extracting pages in parallel."""
+    tasks = list(page_ranges(paths, pages_per_task))
+    if workers <= 1 or len(tasks) <= 1:  # not worth starting processes
+        for task in tasks:
+            yield from extract_pages(*task, chunk_size, chunk_overlap)
+        return
+
+    pool = get_pool(workers)
+    in_flight = deque()
+    try:
+        for task in tasks:
+            in_flight.append(pool.submit(extract_pages, *task, chunk_size, chunk_overlap))
+            if len(in_flight) >= workers * 2:
+                yield from in_flight.popleft().result()
+        while in_flight:
+            yield from in_flight.popleft().result()
+    except BrokenProcessPool:
+        with _pools_lock:  # a worker died: start a fresh pool next time
+            if _pools.get(workers) is pool:
+                del _pools[workers]
+        raise
+    finally:
+        for future in in_flight:  # consumer stopped early
+            future.cancel()
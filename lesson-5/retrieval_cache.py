@@ -0,0 +1,127 @@
+"""
+Query embedding + top-k result cache for the interactive RAG loop.
+
+Asking the same question twice (or with different case, spacing or a
+trailing "?") used to embed the query and search the store again. Here both
+steps are cached in LRU dictionaries keyed by the normalized query text:
+
+- query embeddings only depend on the embedding model, so they stay valid
+- top-k results depend on the indexed content: they are dropped automatically
+  whenever the store's version changes (new content indexed, by this process
+  or by another one such as app.py)
+
+The retriever also records how long each stage took (`last_timings`) so the
+app can print embed / search / generate times with every answer.
+
+Usage:
+    retriever = CachedRetriever(vector_store=vector_store, embedder=embedder, k=3,
+                                index_directory="chroma_db")  # Chroma store from open_index
+"""
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from langchain_core.retrievers import BaseRetriever
+from pydantic import PrivateAttr
+
+from indexing import MANIFEST_NAME
+
+RETRIEVAL_CACHE_SIZE = int(os.getenv("RETRIEVAL_CACHE_SIZE", "256"))
+
+
+def normalize_query(query):
+    """'  What is  Azure DNS? ' -> 'what is azure dns'"""
+    return re.sub(r"\s+", " ", query).strip().rstrip("?!. ").lower()
+
+
+def store_version(vector_store, index_directory=None):
+    """
+    A token that changes whenever content is indexed into `vector_store`.
+    Chroma stores are written through indexing.open_index, which rewrites the
+    manifest in `index_directory` (its persist_directory) every time.
+    """
+    folder = getattr(vector_store, "folder", None)  # FaissStore
+    if folder is not None:
+        return tuple(os.stat(os.path.join(folder, name)).st_mtime_ns for name in ("index.faiss", "docstore.offsets"))
+    if index_directory is None:
+        return None  # nothing to watch: results stay cached until clear()
+    manifest = os.path.join(index_directory, MANIFEST_NAME)
+    return os.stat(manifest).st_mtime_ns if os.path.exists(manifest) else None
+
+
+def _lru_get(cache, key):
+    value = cache.get(key)
+    if value is not None:
+        cache.move_to_end(key)
+    return value
+
+
+def _lru_put(cache, key, value, max_entries):
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > max_entries:
+        cache.popitem(last=False)
+
+
+class CachedRetriever(BaseRetriever):
+    """Similarity retriever with cached query embeddings and top-k results."""
+
+    vector_store: Any
+    embedder: Any
+    k: int = 3
+    index_directory: Optional[str] = None   # persist_directory passed to indexing.open_index (Chroma)
+    max_entries: int = RETRIEVAL_CACHE_SIZE
+    last_timings: dict = {}
+
+    _embeddings: OrderedDict = PrivateAttr(default_factory=OrderedDict)
+    _results: OrderedDict = PrivateAttr(default_factory=OrderedDict)
+    _version: Any = PrivateAttr(default=None)
+    _stats: dict = PrivateAttr(default_factory=lambda: {"queries": 0, "embed_hits": 0, "result_hits": 0, "invalidations": 0})
+
+    def _get_relevant_documents(self, query, *, run_manager=None):
+        key = normalize_query(query)
+        self._stats["queries"] += 1
+        timings = {"embed": 0.0, "search": 0.0, "embed_cached": False, "search_cached": False}
+
+        version = store_version(self.vector_store, self.index_directory)
+        if version != self._version:
+            if self._version is not None:
+                self._stats["invalidations"] += 1
+            self._results.clear()
+            self._version = version
+
+        docs = _lru_get(self._results, (key, self.k))
+        if docs is not None:
+            self._stats["result_hits"] += 1
+            timings["embed_cached"] = timings["search_cached"] = True
+            self.last_timings = timings
+            return list(docs)
+
+        start = time.perf_counter()
+        vector = _lru_get(self._embeddings, key)
+        if vector is None:
+            vector = self.embedder.embed_query(query)
+            _lru_put(self._embeddings, key, vector, self.max_entries)
+        else:
+            self._stats["embed_hits"] += 1
+            timings["embed_cached"] = True
+        timings["embed"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        docs = self.vector_store.similarity_search_by_vector(vector, k=self.k)
+        timings["search"] = time.perf_counter() - start
+        _lru_put(self._results, (key, self.k), docs, self.max_entries)
+        self.last_timings = timings
+        return list(docs)
+
+    def clear(self):
+        self._embeddings.clear()
+        self._results.clear()
+
+    def stats_text(self):
+        s = self._stats
+        return (f"Retrieval cache: {s['queries']} queries | {s['result_hits']} result hits | "
+                f"{s['embed_hits']} embedding hits | {s['invalidations']} invalidations | "
+                f"{len(self._embeddings)} embeddings, {len(self._results)} results cached")
@@ -0,0 +1,38 @@
+"""
+Streaming retrieval QA for the lesson-5 CLI.
+
+`qa.invoke({"query": ...})` only returns once the whole answer exists. Here
+the same "stuff" chain is run in two visible steps: retrieval first, then the
+LLM's tokens are streamed as they are generated. The prompt is the one
+RetrievalQA uses, so the answers match the blocking chain.
+
+Usage:
+    docs, tokens = stream_qa(llm, retriever, "What is Azure DNS?")
+    for token in tokens:
+        print(token, end="", flush=True)
+    print(format_sources(docs))
+"""
+from langchain.chains.question_answering.stuff_prompt import PROMPT
+
+
+def format_context(docs):
+    """Retrieved chunks joined the way the "stuff" chain does it."""
+    return "\n\n".join(doc.page_content for doc in docs)
+
+
+def stream_qa(llm, retriever, query):
+    """Retrieve, then start generating. Returns (source documents, token iterator)."""
+    docs = retriever.invoke(query)
+    prompt = PROMPT.format(context=format_context(docs), question=query)
+    return docs, llm.stream(prompt)
+
+
+def format_sources(docs, preview=100):
+    """One numbered line per source document: file, page and the start of the chunk."""
+    lines = []
+    for i, doc in enumerate(docs, start=1):
+        page = doc.metadata.get("page_label") or doc.metadata.get("page")
+        where = doc.metadata.get("source", "?") + (f" p.{page}" if page is not None else "")
+        text = " ".join(doc.page_content.split())[:preview]
+        lines.append(f"{i}. {where}: {text} ...")
+    return "\n".join(lines)
@@ -1,10 +1,37 @@
+import hashlib
+import os
+import tempfile
+from itertools import islice
+
 import streamlit as st
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import Chroma
 from langchain_ollama import OllamaEmbeddings, OllamaLLM
 from langchain.chains import RetrievalQA  # Correct top-level import currently supported
 
+from embedding_cache import CachedEmbeddings
+from pdf_ingest import iter_pdf_chunks
+
+UPLOAD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "uploads")  # saved PDFs, by content
+ADD_BATCH_SIZE = 64        # chunks embedded and added per step
+
+
+def save_upload(file):
+    """
+    Save an uploaded PDF as uploads/<content hash>/<name>. Sessions uploading
+    different files with the same name never overwrite each other, and the
+    same file is written once (atomically, so a reader never sees half of it).
+    """
+    data = file.getbuffer()
+    folder = os.path.join(UPLOAD_DIR, hashlib.sha256(data).hexdigest()[:16])
+    path = os.path.join(folder, os.path.basename(file.name))
+    if not os.path.exists(path):
+        os.makedirs(folder, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=folder, suffix=".part")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    return path
+
 
 st.set_page_config(page_title="Ask Your PDF", layout="wide")
 st.title("📄 Ask Your PDF (Ollama + Chroma)")
@@ -22,30 +49,27 @@ uploaded_files = st.file_uploader(
 if uploaded_files:
     st.info("Loading PDFs and preparing vector store... This may take a few seconds.")
 
-    # Load all PDFs
-    all_documents = []
-    for file in uploaded_files:
-        loader = PyPDFLoader(file)
-        docs = loader.load()
-        all_documents.extend(docs)
-
-    st.success(f"Loaded {len(all_documents)} document(s) from {len(uploaded_files)} PDF(s).")
+    # Save the uploads so the worker processes can open them by path
+    pdf_paths = [save_upload(file) for file in uploaded_files]
 
-    # Split into chunks
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
-    docs = text_splitter.split_documents(all_documents)
-    st.info(f"Split PDFs into {len(docs)} chunks.")
+    # Generate embeddings (cached on disk: re-uploading a PDF costs no embedding calls)
+    embedder = CachedEmbeddings(OllamaEmbeddings(model="mxbai-embed"))
 
-    # Generate embeddings
-    embedder = OllamaEmbeddings(model="mxbai-embed")
-
-    # Create Chroma vector store (auto-persisted)
-    vector_store = Chroma.from_documents(
-        documents=docs,
-        embedding=embedder,
+    # Chroma vector store (auto-persisted)
+    vector_store = Chroma(
+        embedding_function=embedder,
         persist_directory="chroma_db"  # optional, reload later
     )
 
+    # Extract + split pages on all CPU cores and stream the chunks into the store
+    # batch by batch, so large PDFs never sit in memory as a whole
+    chunks = iter_pdf_chunks(pdf_paths, chunk_size=1000, chunk_overlap=100)
+    total = 0
+    while batch := list(islice(chunks, ADD_BATCH_SIZE)):
+        vector_store.add_documents(batch)
+        total += len(batch)
+    st.success(f"Indexed {total} chunks from {len(uploaded_files)} PDF(s).")
+
     # Setup LLM and Retriever
     llm = OllamaLLM(model="qwen3:4b")
     retriever = vector_store.as_retriever(search_type="similarity", search_kwargs={"k": 3})
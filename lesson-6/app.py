@@ -7,6 +7,8 @@ from langchain_community.vectorstores import Chroma
 from langchain_core.documents import Document
 from langchain_classic.chains import RetrievalQA
 
+from embedding_cache import CachedEmbeddings
+
 # ----- CONFIG -----
 CHAT_MODEL = "qwen3:4b"          # any chat-capable model you have in Ollama
 EMBED_MODEL = "nomic-embed-text" # any embedding model you have in Ollama
@@ -23,7 +25,8 @@ def get_llm():
 
 @st.cache_resource
 def get_embeddings():
-    return OllamaEmbeddings(model=EMBED_MODEL)
+    # Cached on disk: rebuilding the store from known chunks costs no embedding calls
+    return CachedEmbeddings(OllamaEmbeddings(model=EMBED_MODEL))
 
 
 # ----- load_documents -----